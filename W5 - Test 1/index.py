@@ -1,6 +1,53 @@
 import os
+import re
+import json
+import hashlib
+import calendar
+import mmap
+import zlib
+import bz2
+import gzip
+import queue
+import glob
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
 from threading import Thread, Lock
 import time
+import operator
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+BLOCK_SIZE = 64 * 1024 * 1024 #* bytes scanned per step inside a range, keeps memory flat
+FINGERPRINT_SIZE = 4096 #* bytes at the start of a log used to detect that it was rotated
+READ_SIZE = 1024 * 1024 #* compressed bytes read at a time
+TASK_SIZE = 16 * 1024 * 1024 #* bytes of every task in a directory scan
+TOP_K_BLOCK_SIZE = 4 * 1024 * 1024 #* bytes counted exactly before they are folded into a Space-Saving summary
+TOP_K_CAPACITY = 10_000 #* default number of items kept by every Space-Saving summary
+PIPELINE_DEPTH = 8 #* decompressed pieces waiting to be counted in the pipelined mode
+
+COMPRESSED_FORMATS = {'.gz': 'gzip', '.bz2': 'bz2', '.zst': 'zstd'}
+
+#* first bytes of a gzip member, a bz2 stream (with its first block) and a zstd frame
+MEMBER_MAGICS = {
+    'gzip': re.compile(re.escape(b'\x1f\x8b\x08')),
+    'bz2': re.compile(rb'BZh[1-9]1AY&SY'),
+    'zstd': re.compile(re.escape(b'\x28\xb5\x2f\xfd')),
+}
+DECOMPRESSION_ERRORS = (zstandard.ZstdError,) if zstandard is not None else ()
+
+WORD_CHARACTER = rb'[A-Za-z0-9_]' #* bytes that can be part of a word in whole-word mode
+TOKEN_PATTERN = re.compile(WORD_CHARACTER + b'+') #* a token of the top-K statistics
+
+#* 'timestamp LEVEL [thread] component: message', the shape of every record of the Hadoop logs
+RECORD_PATTERN = re.compile(rb'^(\d{4}-\d{2}-\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3}) ([A-Z]+) \[[^\]\n]*\] ([^\s:]+): ?', re.MULTILINE)
 
 
 def word_counter(lines, word):
@@ -23,6 +70,49 @@ def word_counter(lines, word):
 
     return count
 
+def reference_whole_word_counter(lines, word):
+    """Counts the number of times a word appears as a whole token in a list of lines.
+
+    It is the slow reference used to check the block scanners: every line is split into tokens of letters, digits and '_'.
+
+    Args:
+        lines (list): A list of lines.
+        word (str): The word to count, made only of letters, digits and '_'.
+
+    Returns:
+        int: The number of tokens equal to the word.
+    """
+    count = 0
+    word = word.lower()
+
+    for line in lines:
+        count += re.findall(r'[A-Za-z0-9_]+', line.lower()).count(word)
+
+    return count
+
+def whole_word_pattern(term):
+    """Compiles a regex that matches a term only when it is not part of a bigger word.
+
+    The literal goes first and the boundary before it is checked with a lookbehind afterwards, so the regex engine
+    can still jump between candidates with its fast literal search instead of trying every position of the block.
+
+    Args:
+        term (bytes): The term as lowercase bytes, made only of letters, digits and '_'.
+
+    Returns:
+        re.Pattern: The compiled regex.
+
+    Raises:
+        ValueError: If the term has other bytes, such a term can never be a whole token of the reference counter.
+    """
+    if not re.fullmatch(WORD_CHARACTER + b'+', term):
+        raise ValueError(f"Termino no valido para palabras completas: {term!r}. Use solo letras, digitos y '_'")
+
+    return re.compile(
+        re.escape(term) + b'(?<!' + WORD_CHARACTER + b'.{%d})' % len(term) + b'(?!' + WORD_CHARACTER + b')',
+        re.DOTALL,
+    )
+
 def parallel_worker(lines, word, lock, total_count):
     """Counts the number of times a word appears in a list of lines and updates the total count.
 
@@ -36,71 +126,1670 @@ def parallel_worker(lines, word, lock, total_count):
     with lock:
         total_count[0] += count
 
-def parallel_word_counter(path, word):
-    """Divides the work equally and launches threads based on the number of cores.
+def split_lines(lines, num_chunks):
+    """Divides a list of lines into num_chunks chunks, the last one takes the remaining lines.
+
+    Args:
+        lines (list): A list of lines.
+        num_chunks (int): The number of chunks.
+
+    Returns:
+        list: The chunks of lines.
+    """
+    chunk_size = len(lines) // num_chunks
+    chunks = []
+
+    for i in range(num_chunks):
+        start = i * chunk_size
+        end = start + chunk_size if i != num_chunks - 1 else len(lines)
+        chunks.append(lines[start:end])
+
+    return chunks
+
+def tree_reduce(values, combine, initial=0):
+    """Combines a list of partial results in pairs, level by level, like a reduction tree.
+
+    No value is shared between the workers, each one only returns its partial result.
+
+    Args:
+        values (iterable): The partial results.
+        combine (callable): The function that combines two partial results, e.g. operator.add.
+        initial: The result when there are no values.
+
+    Returns:
+        The combination of all the values.
+    """
+    values = list(values)
+    if not values:
+        return initial
+
+    while len(values) > 1:
+        combined = [combine(values[i], values[i + 1]) for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2 == 1:
+            combined.append(values[-1])
+        values = combined
+
+    return values[0]
+
+def locked_word_counter(path, word, num_threads=None):
+    """Counts a word with threads that add their partial count to a shared total protected by a lock.
+
+    It is the original accumulation of parallel_word_counter() (now waiting for the threads with join()),
+    kept to compare it with the lock-free reduction.
 
     Args:
+        path (str): The path to the file.
         word (str): The word to count.
+        num_threads (int): The number of threads to use, defaults to the number of cores.
+
+    Returns:
+        int: The number of times the word appears in the file.
+    """
+    num_threads = num_threads or os.cpu_count()
+
+    with open_log(path) as f:
+        lines = f.readlines()
+
+    lock = Lock()
+    total_count = [0]
+
+    threads = [Thread(target=parallel_worker, args=(chunk, word, lock, total_count)) for chunk in split_lines(lines, num_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return total_count[0]
+
+def parallel_word_counter(path, word, num_threads=None):
+    """Divides the work equally and launches threads based on the number of cores.
+
+    Every thread returns its partial count through a future and the partial counts are combined with tree_reduce(),
+    so there is no shared total and no count is lost because the result is read before the threads finish.
+
+    Args:
         path (str): The path to the file.
+        word (str): The word to count.
+        num_threads (int): The number of threads to use, defaults to the number of cores.
 
     Returns:
         int: The number of times the word appears in the file.
-    """ 
-    num_threads = os.cpu_count()
+    """
+    num_threads = num_threads or os.cpu_count()
 
-    with open(path, 'r') as f:
+    with open_log(path) as f:
         lines = f.readlines()
-        num_lines = len(lines)
 
-        chunk_size = num_lines // num_threads
-        range_start = 0
-        range_end = num_lines - 1
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [executor.submit(word_counter, chunk, word) for chunk in split_lines(lines, num_threads)]
+        return tree_reduce([future.result() for future in futures], operator.add)
 
-        lock = Lock()
-        total_count = [0]  
+def split_byte_ranges(size, num_chunks):
+    """Divides a file of the given size into equal byte ranges.
 
-        for i in range(num_threads):
-            start = range_start + i * chunk_size
-            end = start + chunk_size
+    The ranges are not aligned to lines, every worker aligns its own range with line_aligned_range().
 
-            if i == num_threads - 1:
-                end = range_end + 1
+    Args:
+        size (int): The size of the file in bytes.
+        num_chunks (int): The number of ranges to create.
 
-            Thread(target=parallel_worker, args=(lines[start:end], word, lock, total_count)).start()
+    Returns:
+        list: A list of (start, end) tuples covering the whole file.
+    """
+    chunk_size = max(1, size // num_chunks)
+    ranges = []
 
+    for start in range(0, size, chunk_size):
+        ranges.append((start, min(start + chunk_size, size)))
 
-        return total_count[0]
+    #? The last range takes the remaining bytes instead of creating a tiny extra chunk
+    if len(ranges) > num_chunks:
+        ranges.pop()
+        ranges[-1] = (ranges[-1][0], size)
 
+    return ranges
 
-if __name__ == '__main__':
-    
-    path = input("Ingrese el nombre del archivo con su extension donde desea buscar: ")
-    word = input("Introduzca la palabra que deseas buscar: ")
-    
-    start_time = time.time()
-    with open(path, 'r') as f:
-        lines = f.readlines()
-    
-    serial_times_word_appear = word_counter(lines, word)
-    end_time = time.time()
-    elapsed_time = end_time - start_time
+def line_aligned_range(mm, start, end):
+    """Moves the limits of a byte range to line boundaries.
 
-    print(f"Numero de veces que aparece la palabra '{word}' en el archivo {path}: {serial_times_word_appear}")
-    print(f"Tiempo de ejecución en serie: {elapsed_time} segundos.")
+    A line belongs to the range that contains its first byte, so the range skips the line it starts in the middle of
+    and extends its end until the end of the last line that starts inside it.
 
-    start_time = time.time()
-    parallel_times_word_appear = parallel_word_counter(path, word)
-    end_time = time.time()
-    elapsed_time = end_time - start_time
+    Args:
+        mm (mmap.mmap): The memory-mapped file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
 
-    print(f"Numero de veces que aparece la palabra '{word}' en el archivo {path}: {parallel_times_word_appear}")
-    print(f"Tiempo de ejecución en paralelo: {elapsed_time} segundos.")
+    Returns:
+        tuple: The aligned (start, end) range, start == end when no line starts inside the range.
+    """
+    size = len(mm)
+
+    if start > 0:
+        newline = mm.find(b'\n', start - 1)
+        start = size if newline == -1 else newline + 1
+
+    if end < size:
+        newline = mm.find(b'\n', end - 1)
+        end = size if newline == -1 else newline + 1
+
+    return start, max(start, end)
+
+def iter_line_blocks(mm, start, end, block_size=BLOCK_SIZE):
+    """Yields blocks of at most block_size bytes (unless a single line is longer) that end on a line boundary.
+
+    Args:
+        mm (mmap.mmap): The memory-mapped file.
+        start (int): The first byte, already aligned to a line.
+        end (int): The byte after the last one, already aligned to a line.
+        block_size (int): The target size of every block.
+
+    Yields:
+        bytes: A block of complete lines.
+    """
+    while start < end:
+        stop = start + block_size
+
+        if stop >= end:
+            stop = end
+        else:
+            newline = mm.find(b'\n', stop - 1, end)
+            stop = end if newline == -1 else newline + 1
+
+        yield mm[start:stop]
+        start = stop
+
+def mmap_range_counter(mm, start, end, word, block_size=BLOCK_SIZE, whole_word=False):
+    """Counts the number of times a word appears in a byte range of a memory-mapped file.
+
+    The range is scanned in line-aligned blocks, so no list of lines is created and a match can never be split
+    between two blocks. Case folding is done with bytes.lower(), which is equivalent to casefold() for ASCII logs.
+    With whole_word the word is searched with one compiled regex over the whole block, so "error" no longer
+    matches "errors" or "terror".
+
+    Args:
+        mm (mmap.mmap): The memory-mapped file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        word (str): The word to count.
+        block_size (int): The size of the blocks read from the range.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        int: The number of times the word appears in the lines that start inside the range.
+    """
+    start, end = line_aligned_range(mm, start, end)
+    word = word.lower().encode()
+    pattern = whole_word_pattern(word) if whole_word else None
+
+    count = 0
+    for block in iter_line_blocks(mm, start, end, block_size):
+        if pattern is not None:
+            count += len(pattern.findall(block.lower()))
+        else:
+            count += block.lower().count(word)
+
+    return count
+
+def mmap_word_counter(path, word, num_threads=None, whole_word=False):
+    """Counts the number of times a word appears in a file by memory-mapping it and splitting it in byte ranges.
+
+    Unlike parallel_word_counter(), the file is never loaded as a list of lines, so memory stays flat no matter
+    how big the log is.
+
+    Args:
+        path (str): The path to the file.
+        word (str): The word to count.
+        num_threads (int): The number of threads to use, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        int: The number of times the word appears in the file.
+    """
+    num_threads = num_threads or os.cpu_count()
+
+    if compression_format(path):
+        return compressed_word_counter(path, [word], num_threads, whole_word)[word]
+
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return 0
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            ranges = split_byte_ranges(size, num_threads)
+
+            with ThreadPoolExecutor(max_workers=num_threads) as executor:
+                counts = executor.map(lambda r: mmap_range_counter(mm, r[0], r[1], word, whole_word=whole_word), ranges)
+                return tree_reduce(counts, operator.add)
+
+def process_range_worker(path, start, end, word, whole_word=False):
+    """Opens the file in a worker process and counts the word inside its own byte range.
+
+    Only the path and the range limits are sent to the process and only the partial count comes back.
+
+    Args:
+        path (str): The path to the file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        word (str): The word to count.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        int: The number of times the word appears in the range.
+    """
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mmap_range_counter(mm, start, end, word, whole_word=whole_word)
+
+def process_word_counter(path, word, num_workers=None, whole_word=False):
+    """Counts the number of times a word appears in a file using a pool of processes to avoid the GIL.
+
+    Args:
+        path (str): The path to the file.
+        word (str): The word to count.
+        num_workers (int): The number of processes to use, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        int: The number of times the word appears in the file.
+    """
+    num_workers = num_workers or os.cpu_count()
+
+    if compression_format(path):
+        return compressed_word_counter(path, [word], num_workers, whole_word)[word]
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+
+    ranges = split_byte_ranges(size, num_workers)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(process_range_worker, path, start, end, word, whole_word) for start, end in ranges]
+        return tree_reduce([future.result() for future in futures], operator.add)
+
+def terms_overlap(a, b):
+    """Checks if two occurrences of different terms can share bytes (one contains the other or one ends with the start of the other).
+
+    Args:
+        a (bytes): The first term.
+        b (bytes): The second term.
+
+    Returns:
+        bool: True if the terms can overlap.
+    """
+    if a in b or b in a:
+        return True
+
+    for size in range(1, min(len(a), len(b))):
+        if a.endswith(b[:size]) or b.endswith(a[:size]):
+            return True
+
+    return False
+
+def compile_terms(words, whole_word=False):
+    """Compiles a set of words into a matcher that counts all of them in a single scan of a block.
+
+    Terms that can never overlap are joined in one regex alternation, so one match is exactly one occurrence of one term.
+    Terms that can overlap with another one are counted with bytes.count() on the same block to keep the counts equal
+    to word_counter(). In whole-word mode every term gets its own regex, an alternation would lose the fast literal
+    search of whole_word_pattern().
+
+    Args:
+        words (iterable): The words to count.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        tuple: The combined regex (or None) and the list of (term, regex or None) pairs counted separately.
+    """
+    terms = sorted({word.lower().encode() for word in words if word}, key=len, reverse=True)
+
+    if whole_word:
+        return None, [(term, whole_word_pattern(term)) for term in terms]
+
+    separate = [term for term in terms if any(other != term and terms_overlap(term, other) for other in terms)]
+    combined = [term for term in terms if term not in separate]
+
+    pattern = re.compile(b'|'.join(re.escape(term) for term in combined)) if combined else None
+    separate = [(term, None) for term in separate]
+
+    return pattern, separate
+
+def count_terms_in_block(block, matcher, counts):
+    """Adds the occurrences of every term of the matcher in a block of complete lines to counts.
+
+    Args:
+        block (bytes): The block of lines.
+        matcher (tuple): The matcher returned by compile_terms().
+        counts (Counter): The counts to update, keyed by the lowercase terms.
+    """
+    pattern, separate = matcher
+    block = block.lower()
+
+    if pattern is not None:
+        counts.update(pattern.findall(block))
+
+    for term, term_pattern in separate:
+        if term_pattern is not None:
+            counts[term] += len(term_pattern.findall(block))
+        else:
+            counts[term] += block.count(term)
+
+def terms_range_counter(mm, start, end, matcher, block_size=BLOCK_SIZE):
+    """Counts every term of the matcher in a byte range of a memory-mapped file reading each block only once.
+
+    Args:
+        mm (mmap.mmap): The memory-mapped file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        matcher (tuple): The matcher returned by compile_terms().
+        block_size (int): The size of the blocks read from the range.
+
+    Returns:
+        Counter: The number of occurrences of every term (as lowercase bytes).
+    """
+    start, end = line_aligned_range(mm, start, end)
+
+    counts = Counter()
+    for block in iter_line_blocks(mm, start, end, block_size):
+        count_terms_in_block(block, matcher, counts)
+
+    return counts
+
+def process_terms_worker(path, start, end, words, whole_word=False):
+    """Opens the file in a worker process and counts all the words inside its own byte range.
+
+    Args:
+        path (str): The path to the file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        words (list): The words to count.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        Counter: The number of occurrences of every term in the range.
+    """
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return terms_range_counter(mm, start, end, compile_terms(words, whole_word))
+
+def parallel_terms_counter(path, start, end, words, num_workers=None, whole_word=False):
+    """Counts all the words in a line-aligned byte range of a file, splitting it between processes.
+
+    Ranges smaller than one block are scanned in the calling process, starting a pool would cost more than the scan.
+
+    Args:
+        path (str): The path to the file.
+        start (int): The first byte of the range, at the beginning of a line.
+        end (int): The byte after the last one of the range, at the end of a line or of the file.
+        words (list): The words to count.
+        num_workers (int): The number of processes to use, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        Counter: The number of occurrences of every term (as lowercase bytes).
+    """
+    num_workers = num_workers or os.cpu_count()
+
+    if end <= start:
+        return Counter()
+
+    if num_workers == 1 or end - start <= BLOCK_SIZE:
+        return process_terms_worker(path, start, end, words, whole_word)
+
+    ranges = [(start + range_start, start + range_end) for range_start, range_end in split_byte_ranges(end - start, num_workers)]
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [executor.submit(process_terms_worker, path, range_start, range_end, words, whole_word) for range_start, range_end in ranges]
+        return tree_reduce([future.result() for future in futures], operator.add, Counter())
+
+def terms_to_words(totals, words):
+    """Maps the counts of the lowercase terms back to the words requested by the user.
+
+    Args:
+        totals (Counter): The counts returned by terms_range_counter().
+        words (list): The words requested by the user.
+
+    Returns:
+        dict: The number of times every word appears.
+    """
+    return {word: totals[word.lower().encode()] if word else 0 for word in words}
+
+def multi_word_counter(path, words, num_workers=None, whole_word=False):
+    """Counts how many times each word appears in a file with a single pass over the file.
+
+    Args:
+        path (str): The path to the file.
+        words (iterable): The words to count, e.g. ERROR, FATAL, container IDs or host names.
+        num_workers (int): The number of processes to use, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        dict: The number of times every word appears in the file.
+    """
+    words = list(words)
+
+    if compression_format(path):
+        return compressed_word_counter(path, words, num_workers, whole_word)
+
+    totals = parallel_terms_counter(path, 0, os.path.getsize(path), words, num_workers, whole_word)
+
+    return terms_to_words(totals, words)
+
+def file_fingerprint(f, size):
+    """Calculates a hash of the first bytes of a file, used to detect that a log was replaced by a new one.
+
+    Args:
+        f (file): The file opened in binary mode.
+        size (int): The number of bytes to hash, at most FINGERPRINT_SIZE.
+
+    Returns:
+        str: The hexadecimal SHA-1 of the first bytes.
+    """
+    f.seek(0)
+    return hashlib.sha1(f.read(min(size, FINGERPRINT_SIZE))).hexdigest()
+
+def load_counter_state(state_path):
+    """Reads the sidecar state file of an incremental count.
+
+    Args:
+        state_path (str): The path to the state file.
+
+    Returns:
+        dict: The saved state, or None if the file does not exist or is corrupted.
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_counter_state(state_path, state):
+    """Writes the sidecar state file atomically, so an interrupted run never leaves a half-written state.
+
+    Args:
+        state_path (str): The path to the state file.
+        state (dict): The state to save.
+    """
+    tmp_path = state_path + '.tmp'
+
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+
+    os.replace(tmp_path, state_path)
+
+def incremental_word_counter(path, words, state_path=None, num_workers=None, whole_word=False):
+    """Counts how many times each word appears in an append-only log, scanning only the bytes added since the last run.
+
+    The offset reached and the counts so far are saved in a sidecar state file. The count starts again from the
+    beginning when the file was rotated (different inode or different first bytes), truncated (smaller than the
+    saved offset) or the set of words or the matching mode changed. A last line without its newline is left for the next run.
+
+    Args:
+        path (str): The path to the log.
+        words (iterable): The words to count.
+        state_path (str): The path to the state file, defaults to the log path followed by '.state'.
+        num_workers (int): The number of processes to use for big appends, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        dict: The number of times every word appears in the complete lines of the log.
+    """
+    words = list(words)
+    state_path = state_path or path + '.state'
+    state = load_counter_state(state_path)
+
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        size = stat.st_size
+
+        is_same_file = (
+            state is not None
+            and state['inode'] == stat.st_ino
+            and state['device'] == stat.st_dev
+            and sorted(state['counts']) == sorted(set(words))
+            and state.get('whole_word', False) == whole_word
+            and state['offset'] <= size
+            and state['fingerprint'] == file_fingerprint(f, state['offset'])
+        )
+
+        if is_same_file:
+            offset = state['offset']
+            counts = state['counts']
+        else:
+            offset = 0
+            counts = {word: 0 for word in words}
+
+        #? Only complete lines are counted, the last one may still be written
+        end = offset
+        if size > offset:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                end = mm.rfind(b'\n', offset) + 1 or offset
+
+        new_counts = terms_to_words(parallel_terms_counter(path, offset, end, words, num_workers, whole_word), words)
+        for word in counts:
+            counts[word] += new_counts[word]
+
+        save_counter_state(state_path, {
+            'inode': stat.st_ino,
+            'device': stat.st_dev,
+            'offset': end,
+            'fingerprint': file_fingerprint(f, end),
+            'whole_word': whole_word,
+            'counts': counts,
+        })
+
+    return {word: counts[word] for word in words}
+
+def parse_record_range(mm, start, end, block_size=BLOCK_SIZE):
+    """Parses the records of a byte range of a Hadoop log into columns.
+
+    Every record has the shape 'timestamp LEVEL [thread] component: message'. Lines that do not start with a
+    timestamp (stack traces, container messages) are skipped.
+
+    Args:
+        mm (mmap.mmap): The memory-mapped log.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        block_size (int): The size of the blocks read from the range.
+
+    Returns:
+        dict: The columns of the range, levels and components are codes into the 'level_names' and 'component_names' lists.
+    """
+    start, end = line_aligned_range(mm, start, end)
+
+    columns = {
+        'timestamps': array('q'),
+        'levels': array('H'),
+        'components': array('I'),
+        'message_starts': array('q'),
+        'message_ends': array('q'),
+        'level_names': [],
+        'component_names': [],
+    }
+    level_codes = {}
+    component_codes = {}
+    day_starts = {}
+
+    for block in iter_line_blocks(mm, start, end, block_size):
+        for match in RECORD_PATTERN.finditer(block):
+            day, hour, minute, second, millisecond, level, component = match.groups()
+
+            if day not in day_starts:
+                day_starts[day] = calendar.timegm(time.strptime(day.decode(), '%Y-%m-%d')) * 1000
+            timestamp = day_starts[day] + ((int(hour) * 60 + int(minute)) * 60 + int(second)) * 1000 + int(millisecond)
+
+            if level not in level_codes:
+                level_codes[level] = len(columns['level_names'])
+                columns['level_names'].append(level.decode())
+            if component not in component_codes:
+                component_codes[component] = len(columns['component_names'])
+                columns['component_names'].append(component.decode())
+
+            line_end = block.find(b'\n', match.end())
+            line_end = len(block) if line_end == -1 else line_end
+
+            columns['timestamps'].append(timestamp)
+            columns['levels'].append(level_codes[level])
+            columns['components'].append(component_codes[component])
+            columns['message_starts'].append(start + match.end())
+            columns['message_ends'].append(start + line_end)
+
+        start += len(block)
+
+    return columns
+
+def process_index_worker(path, start, end):
+    """Opens the log in a worker process and parses the records of its own byte range.
+
+    Args:
+        path (str): The path to the log.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+
+    Returns:
+        dict: The columns returned by parse_record_range().
+    """
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_record_range(mm, start, end)
+
+def parse_query_time(value, reference_ms):
+    """Converts a query time to milliseconds since the epoch.
+
+    Args:
+        value (int, datetime or str): Milliseconds, a datetime, a full timestamp like '2015-10-17 15:38:00,000' or
+            only the time of the day like '15:38', which is taken on the day of reference_ms.
+        reference_ms (int): The timestamp of the first record of the log.
+
+    Returns:
+        int: The time in milliseconds since the epoch.
+    """
+    if isinstance(value, int):
+        return value
+
+    if isinstance(value, datetime):
+        return calendar.timegm(value.timetuple()) * 1000 + value.microsecond // 1000
+
+    if ' ' not in value:
+        day = time.strftime('%Y-%m-%d', time.gmtime(reference_ms // 1000))
+        value = f"{day} {value}"
+
+    value, _, millisecond = value.partition(',')
+    for time_format in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return calendar.timegm(time.strptime(value, time_format)) * 1000 + int(millisecond or 0)
+        except ValueError:
+            pass
+
+    raise ValueError(f"Formato de fecha no valido: {value}")
+
+class LogIndex:
+    """Columnar index of a Hadoop log with an inverted index by (level, component).
+
+    The log is parsed once into columns (timestamps in milliseconds, dictionary-encoded levels and components and
+    the offsets of every message) and the rows of every (level, component) pair are kept sorted by timestamp, so a
+    query only touches the postings of the pairs it asks for and finds the time range with a binary search.
+    """
+
+    COLUMNS = {'timestamps': 'q', 'levels': 'H', 'components': 'I', 'message_starts': 'q', 'message_ends': 'q'}
+
+    def __init__(self, columns, postings):
+        """Creates an index from its columns and postings, use build() or load() instead.
+
+        Args:
+            columns (dict): The columns returned by parse_record_range() for the whole log.
+            postings (dict): The row ids of every (level code, component code) pair sorted by timestamp.
+        """
+        self.columns = columns
+        self.postings = postings
+
+    @classmethod
+    def build(cls, path, num_workers=None):
+        """Parses a log in parallel and builds its index.
+
+        Args:
+            path (str): The path to the log.
+            num_workers (int): The number of processes to use, defaults to the number of cores.
+
+        Returns:
+            LogIndex: The index of the log.
+        """
+        num_workers = num_workers or os.cpu_count()
+        size = os.path.getsize(path)
+
+        columns = {name: array(typecode) for name, typecode in cls.COLUMNS.items()}
+        columns['level_names'] = []
+        columns['component_names'] = []
+        codes = {'level_names': {}, 'component_names': {}}
+
+        if size == 0:
+            return cls(columns, {})
+
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(process_index_worker, path, start, end) for start, end in split_byte_ranges(size, num_workers)]
+
+            #? The codes of every range are local, they are translated to the codes of the whole log in order
+            for future in futures:
+                partial = future.result()
+
+                for names, column in (('level_names', 'levels'), ('component_names', 'components')):
+                    mapping = []
+                    for name in partial[names]:
+                        if name not in codes[names]:
+                            codes[names][name] = len(columns[names])
+                            columns[names].append(name)
+                        mapping.append(codes[names][name])
+                    columns[column].extend(mapping[code] for code in partial[column])
+
+                for name in ('timestamps', 'message_starts', 'message_ends'):
+                    columns[name].extend(partial[name])
+
+        #? The timestamps of a log can go slightly backwards between threads, so every posting list is sorted by time
+        grouped = {}
+        for row, key in enumerate(zip(columns['levels'], columns['components'])):
+            grouped.setdefault(key, []).append(row)
+
+        timestamps = columns['timestamps']
+        postings = {key: array('q', sorted(rows, key=timestamps.__getitem__)) for key, rows in grouped.items()}
+
+        return cls(columns, postings)
+
+    def save(self, index_dir):
+        """Writes the index to a directory: one binary file per column and per posting list plus a JSON header.
+
+        Args:
+            index_dir (str): The directory where the index is written.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+
+        for name in self.COLUMNS:
+            with open(os.path.join(index_dir, f"{name}.bin"), 'wb') as f:
+                self.columns[name].tofile(f)
+
+        postings = []
+        offset = 0
+        with open(os.path.join(index_dir, 'postings.bin'), 'wb') as f:
+            for (level, component), rows in self.postings.items():
+                rows.tofile(f)
+                postings.append([level, component, offset, len(rows)])
+                offset += len(rows)
+
+        header = {
+            'level_names': self.columns['level_names'],
+            'component_names': self.columns['component_names'],
+            'num_rows': len(self.columns['timestamps']),
+            'postings': postings,
+        }
+        with open(os.path.join(index_dir, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump(header, f)
+
+    @classmethod
+    def load(cls, index_dir):
+        """Reads an index written by save().
+
+        Args:
+            index_dir (str): The directory of the index.
+
+        Returns:
+            LogIndex: The index.
+        """
+        with open(os.path.join(index_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+
+        columns = {'level_names': header['level_names'], 'component_names': header['component_names']}
+        for name, typecode in cls.COLUMNS.items():
+            columns[name] = array(typecode)
+            with open(os.path.join(index_dir, f"{name}.bin"), 'rb') as f:
+                columns[name].fromfile(f, header['num_rows'])
+
+        all_postings = array('q')
+        with open(os.path.join(index_dir, 'postings.bin'), 'rb') as f:
+            all_postings.fromfile(f, header['num_rows'])
+
+        postings = {(level, component): all_postings[offset:offset + length] for level, component, offset, length in header['postings']}
+
+        return cls(columns, postings)
+
+    @staticmethod
+    def matching_codes(names, value):
+        """Finds the codes of a level or component, a component can also be given by its class name only.
+
+        Args:
+            names (list): The names of the dictionary.
+            value (str): The requested name, None matches every name.
+
+        Returns:
+            set: The matching codes.
+        """
+        if value is None:
+            return set(range(len(names)))
+
+        return {code for code, name in enumerate(names) if name == value or name.endswith('.' + value)}
+
+    def posting_ranges(self, level=None, component=None, start=None, end=None):
+        """Finds the part of every posting list that matches a query, with two binary searches per list.
+
+        Args:
+            level (str): The level, e.g. 'WARN'.
+            component (str): The full component name or its class name, e.g. 'RMContainerAllocator'.
+            start (int, datetime or str): The first time included, see parse_query_time().
+            end (int, datetime or str): The first time excluded, see parse_query_time().
+
+        Yields:
+            tuple: (postings, low, high), the matching rows are postings[low:high].
+        """
+        timestamps = self.columns['timestamps']
+        if not timestamps:
+            return
+
+        start = -2 ** 63 if start is None else parse_query_time(start, timestamps[0])
+        end = 2 ** 63 - 1 if end is None else parse_query_time(end, timestamps[0])
+
+        levels = self.matching_codes(self.columns['level_names'], level)
+        components = self.matching_codes(self.columns['component_names'], component)
+
+        for (level_code, component_code), postings in self.postings.items():
+            if level_code not in levels or component_code not in components:
+                continue
+
+            low = bisect_left(postings, start, key=timestamps.__getitem__)
+            high = bisect_left(postings, end, lo=low, key=timestamps.__getitem__)
+            yield postings, low, high
+
+    def rows(self, level=None, component=None, start=None, end=None):
+        """Finds the rows that match a query.
+
+        Args:
+            level (str): The level, e.g. 'WARN'.
+            component (str): The full component name or its class name, e.g. 'RMContainerAllocator'.
+            start (int, datetime or str): The first time included, see parse_query_time().
+            end (int, datetime or str): The first time excluded, see parse_query_time().
+
+        Returns:
+            list: The sorted row ids.
+        """
+        rows = []
+        for postings, low, high in self.posting_ranges(level, component, start, end):
+            rows.extend(postings[low:high])
+
+        rows.sort()
+        return rows
+
+    def count(self, level=None, component=None, start=None, end=None):
+        """Counts the rows that match a query, e.g. count('WARN', 'RMContainerAllocator', '15:38', '15:40').
+
+        Args:
+            level (str): The level, e.g. 'WARN'.
+            component (str): The full component name or its class name.
+            start (int, datetime or str): The first time included.
+            end (int, datetime or str): The first time excluded.
+
+        Returns:
+            int: The number of matching records.
+        """
+        #? Only the bounds of every posting list are needed, the rows are never materialized
+        return sum(high - low for _, low, high in self.posting_ranges(level, component, start, end))
+
+    def message(self, mm, row):
+        """Reads the message of a row from the memory-mapped log.
+
+        Args:
+            mm (mmap.mmap): The memory-mapped log.
+            row (int): The row id.
+
+        Returns:
+            str: The message of the record.
+        """
+        return mm[self.columns['message_starts'][row]:self.columns['message_ends'][row]].decode(errors='replace')
+
+def compression_format(path):
+    """Finds the compression format of a log from its extension.
+
+    Args:
+        path (str): The path to the log.
+
+    Returns:
+        str: 'gzip', 'bz2', 'zstd' or None for plain text.
+    """
+    return COMPRESSED_FORMATS.get(os.path.splitext(path)[1].lower())
+
+def new_decompressor(fmt):
+    """Creates a decompressor for a single gzip member, bz2 stream or zstd frame.
+
+    Every decompressor sets 'eof' when its member ends and keeps the following bytes in 'unused_data'.
+
+    Args:
+        fmt (str): The compression format.
+
+    Returns:
+        object: The decompressor.
+    """
+    if fmt == 'gzip':
+        return zlib.decompressobj(wbits=31)
+    if fmt == 'bz2':
+        return bz2.BZ2Decompressor()
+    if zstandard is None:
+        raise ImportError("Se necesita el paquete 'zstandard' para leer archivos .zst")
+    return zstandard.ZstdDecompressor().decompressobj()
+
+def open_log(path):
+    """Opens a log as text, decompressing it on the fly when it has a .gz, .bz2 or .zst extension.
+
+    Args:
+        path (str): The path to the log.
+
+    Returns:
+        file: The log opened in text mode.
+    """
+    fmt = compression_format(path)
+
+    if fmt == 'gzip':
+        return gzip.open(path, 'rt')
+    if fmt == 'bz2':
+        return bz2.open(path, 'rt')
+    if fmt == 'zstd':
+        if zstandard is None:
+            raise ImportError("Se necesita el paquete 'zstandard' para leer archivos .zst")
+        return zstandard.open(path, 'rt')
+
+    return open(path, 'r')
+
+def member_candidates(path, fmt):
+    """Finds the offsets where a gzip member, bz2 stream or zstd frame may start.
+
+    The search only looks for the magic bytes, so a candidate can be a false positive inside compressed data;
+    those are discarded later because they do not decompress or do not chain with the previous member.
+
+    Args:
+        path (str): The path to the compressed log.
+        fmt (str): The compression format.
+
+    Returns:
+        list: The sorted candidate offsets, always starting with 0.
+    """
+    pattern = MEMBER_MAGICS[fmt]
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            offsets = [match.start() for match in pattern.finditer(mm)]
+
+    return offsets if offsets and offsets[0] == 0 else [0] + offsets
+
+def count_decompressed(pieces, matcher, block_size=BLOCK_SIZE):
+    """Counts the terms in a stream of decompressed pieces without keeping more than one block in memory.
+
+    The first partial line (head) and the last one (tail) are not counted, because they can continue in the
+    previous or the next member; the caller stitches them.
+
+    Args:
+        pieces (iterable): The decompressed pieces in order.
+        matcher (tuple): The matcher returned by compile_terms().
+        block_size (int): The amount of data collected before counting.
+
+    Returns:
+        tuple: (counts, head, tail), head includes its newline and is None when the stream has no newline at all,
+            in that case tail holds the whole stream.
+    """
+    counts = Counter()
+    head = None
+    buffer = bytearray()
+
+    for piece in pieces:
+        buffer += piece
+
+        if head is None:
+            newline = buffer.find(b'\n')
+            if newline == -1:
+                continue
+            head = bytes(buffer[:newline + 1])
+            del buffer[:newline + 1]
+
+        if len(buffer) >= block_size:
+            last = buffer.rfind(b'\n') + 1
+            count_terms_in_block(bytes(buffer[:last]), matcher, counts)
+            del buffer[:last]
+
+    last = buffer.rfind(b'\n') + 1 if head is not None else 0
+    count_terms_in_block(bytes(buffer[:last]), matcher, counts)
+
+    return counts, head, bytes(buffer[last:])
+
+def read_member(f, fmt, end_offset, read_size=READ_SIZE):
+    """Decompresses a single member from the current position of a file.
+
+    Args:
+        f (file): The compressed file opened in binary mode.
+        fmt (str): The compression format.
+        end_offset (list): A list of one element where the offset after the member is stored.
+        read_size (int): The number of compressed bytes read at a time.
+
+    Yields:
+        bytes: The decompressed pieces of the member.
+
+    Raises:
+        EOFError: If the file ends before the member.
+    """
+    decompressor = new_decompressor(fmt)
+
+    while not decompressor.eof:
+        data = f.read(read_size)
+        if not data:
+            raise EOFError("El miembro comprimido esta incompleto")
+
+        yield decompressor.decompress(data)
+
+        if decompressor.eof:
+            f.seek(-len(decompressor.unused_data), os.SEEK_CUR)
+
+    end_offset[0] = f.tell()
+
+def compressed_member_worker(path, fmt, start, words, whole_word=False):
+    """Decompresses and counts the member that starts at a candidate offset.
+
+    Args:
+        path (str): The path to the compressed log.
+        fmt (str): The compression format.
+        start (int): The candidate offset.
+        words (list): The words to count.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        tuple: (counts, head, tail, end) as in count_decompressed() plus the offset after the member,
+            or the exception raised if no valid member starts at the offset.
+    """
+    end_offset = [None]
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        try:
+            counts, head, tail = count_decompressed(read_member(f, fmt, end_offset), compile_terms(words, whole_word))
+        except (EOFError, OSError, ValueError, zlib.error) + DECOMPRESSION_ERRORS as error:
+            return error
+
+    return counts, head, tail, end_offset[0]
+
+def pipelined_decompression(path, fmt, read_size=READ_SIZE):
+    """Decompresses a whole compressed log in a separate thread, so decompression overlaps with counting.
+
+    Args:
+        path (str): The path to the compressed log.
+        fmt (str): The compression format.
+        read_size (int): The number of compressed bytes read at a time.
+
+    Yields:
+        bytes: The decompressed pieces of all the members, in order.
+    """
+    pieces = queue.Queue(maxsize=PIPELINE_DEPTH)
+    done = object()
+    errors = []
+
+    def reader():
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                end_offset = [0]
+                while end_offset[0] < size:
+                    for piece in read_member(f, fmt, end_offset, read_size):
+                        pieces.put(piece)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            pieces.put(done)
+
+    thread = Thread(target=reader, daemon=True)
+    thread.start()
+
+    while (piece := pieces.get()) is not done:
+        yield piece
+
+    thread.join()
+    if errors:
+        raise errors[0]
+
+def compressed_word_counter(path, words, num_workers=None, whole_word=False):
+    """Counts how many times each word appears in a .gz, .bz2 or .zst log.
+
+    Multi-member gzip files, multi-stream bz2 files and multi-frame zstd files are decompressed and counted in
+    parallel, one member per task. A single-stream file is decompressed in a separate thread while the calling
+    thread counts.
+
+    Args:
+        path (str): The path to the compressed log.
+        words (iterable): The words to count.
+        num_workers (int): The number of processes to use, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        dict: The number of times every word appears in the log.
+    """
+    words = list(words)
+    fmt = compression_format(path)
+    num_workers = num_workers or os.cpu_count()
+    matcher = compile_terms(words, whole_word)
+
+    candidates = member_candidates(path, fmt)
+
+    if len(candidates) <= 1 or num_workers == 1:
+        counts, head, tail = count_decompressed(pipelined_decompression(path, fmt), matcher)
+        count_terms_in_block((head or b'') + tail, matcher, counts)
+        return terms_to_words(counts, words)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = {start: executor.submit(compressed_member_worker, path, fmt, start, words, whole_word) for start in candidates}
+        members = {start: future.result() for start, future in futures.items()}
+
+    return terms_to_words(stitch_members(path, fmt, members, words, whole_word), words)
+
+def stitch_members(path, fmt, members, words, whole_word=False):
+    """Joins the counts of the members of a compressed log, counting the lines split between two members.
+
+    Args:
+        path (str): The path to the compressed log.
+        fmt (str): The compression format.
+        members (dict): The result of compressed_member_worker() for every candidate offset.
+        words (list): The words to count.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        Counter: The number of times every term appears in the log.
+
+    Raises:
+        Exception: The error of the first real member that does not decompress.
+    """
+    matcher = compile_terms(words, whole_word)
+
+    #? Follow the chain of real members from offset 0, the false candidates are never reached
+    totals = Counter()
+    pending = b''
+    offset = 0
+    size = os.path.getsize(path)
+
+    while offset < size:
+        member = members.get(offset)
+        if member is None:
+            #? A member ends where no magic bytes were found (e.g. trailing garbage), decompress it to get its error
+            member = compressed_member_worker(path, fmt, offset, words, whole_word)
+
+        #? A real member that does not decompress is a corrupt or truncated file, as in the single-stream path
+        if isinstance(member, Exception):
+            raise member
+
+        counts, head, tail, offset = member
+        totals.update(counts)
+
+        if head is None:
+            pending += tail
+            continue
+
+        count_terms_in_block(pending + head, matcher, totals)
+        pending = tail
+
+    count_terms_in_block(pending, matcher, totals)
+
+    return totals
+
+class WorkStealingPool:
+    """Runs a list of tasks on a fixed number of worker threads that balance the load by stealing work.
+
+    Every worker owns a deque: it takes tasks from the back of its own deque and, when it is empty, steals from the
+    front of the deque of another worker. When an executor (e.g. a ProcessPoolExecutor) is given, each worker thread
+    is only a scheduling slot and the task itself runs in the executor, outside the GIL.
+    """
+
+    def __init__(self, num_workers=None, executor=None):
+        """Creates the pool.
+
+        Args:
+            num_workers (int): The number of workers, defaults to the number of cores.
+            executor (Executor): Where the tasks run, None runs them in the worker threads.
+        """
+        self.num_workers = num_workers or os.cpu_count()
+        self.executor = executor
+        self.steals = [0] * self.num_workers
+
+    def worker(self, worker_id, deques, fn, results, errors):
+        """Runs tasks until every deque is empty.
+
+        Args:
+            worker_id (int): The index of the worker and of its own deque.
+            deques (list): The deques of (index, args) tasks of all the workers.
+            fn (callable): The function applied to every task.
+            results (list): The list where the result of every task is stored by index.
+            errors (list): The list where the (index, exception) of every failed task is stored.
+        """
+        own = deques[worker_id]
+        victims = deques[worker_id + 1:] + deques[:worker_id]
+
+        while True:
+            try:
+                index, args = own.pop()
+            except IndexError:
+                for victim in victims:
+                    try:
+                        index, args = victim.popleft()
+                        self.steals[worker_id] += 1
+                        break
+                    except IndexError:
+                        continue
+                else:
+                    return
+
+            #? A failed task must not kill the slot, the error is raised by map() once every task has run
+            try:
+                if self.executor is not None:
+                    results[index] = self.executor.submit(fn, *args).result()
+                else:
+                    results[index] = fn(*args)
+            except Exception as error:
+                errors.append((index, error))
+
+    def map(self, fn, tasks):
+        """Applies fn to every task and returns the results in the order of the tasks.
+
+        The tasks are dealt in contiguous blocks, so the tasks of the same file start in the same worker.
+
+        Args:
+            fn (callable): The function applied to every task.
+            tasks (list): The arguments of every call, as tuples.
+
+        Returns:
+            list: The results in the order of the tasks.
+
+        Raises:
+            Exception: The error of the first failed task, in the order of the tasks.
+        """
+        tasks = list(tasks)
+        results = [None] * len(tasks)
+        errors = []
+        deques = [deque() for _ in range(self.num_workers)]
+
+        for index, args in enumerate(tasks):
+            #? own.pop() takes from the back, so the block is stored reversed to run it in file order
+            deques[index * self.num_workers // max(1, len(tasks))].appendleft((index, args))
+
+        threads = [Thread(target=self.worker, args=(worker_id, deques, fn, results, errors)) for worker_id in range(self.num_workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise min(errors, key=lambda error: error[0])[1]
+
+        return results
+
+def expand_log_paths(pattern):
+    """Expands a file, a directory (walked recursively) or a glob pattern into a sorted list of files.
+
+    Args:
+        pattern (str): The file, directory or glob pattern, e.g. 'logs/**/*.log'.
+
+    Returns:
+        list: The paths of the files.
+    """
+    if os.path.isdir(pattern):
+        paths = [os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names]
+    elif os.path.isfile(pattern):
+        paths = [pattern]
+    else:
+        paths = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+
+    return sorted(paths)
+
+def file_tasks(paths, task_size=TASK_SIZE):
+    """Breaks all the files into byte-range tasks of the same size.
+
+    Compressed files can not be split by offset: a multi-member file gets one task per candidate member and a
+    single-stream file is a single task.
+
+    Args:
+        paths (list): The paths of the files.
+        task_size (int): The size of every task in bytes.
+
+    Returns:
+        list: The (path, start, end, member) tasks, member is True when the task decompresses only the member that
+            starts at start.
+    """
+    tasks = []
+
+    for path in paths:
+        size = os.path.getsize(path)
+
+        if size == 0:
+            continue
+
+        fmt = compression_format(path)
+        if fmt:
+            candidates = member_candidates(path, fmt)
+            if len(candidates) <= 1:
+                tasks.append((path, 0, size, False))
+                continue
+
+            for start, end in zip(candidates, candidates[1:] + [size]):
+                tasks.append((path, start, end, True))
+            continue
+
+        for start in range(0, size, task_size):
+            tasks.append((path, start, min(start + task_size, size), False))
+
+    return tasks
+
+def directory_task_worker(path, start, end, member, words, whole_word=False):
+    """Counts the words in one task of a directory scan.
+
+    Args:
+        path (str): The path to the file.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        member (bool): Decompress only the member of a compressed file that starts at start.
+        words (list): The words to count.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+
+    Returns:
+        dict: The number of times every word appears in the task, or for a member the result of
+            compressed_member_worker(), which is stitched with the other members of the file.
+    """
+    fmt = compression_format(path)
+
+    if member:
+        return compressed_member_worker(path, fmt, start, words, whole_word)
+
+    if fmt:
+        return compressed_word_counter(path, words, 1, whole_word)
+
+    return terms_to_words(process_terms_worker(path, start, end, words, whole_word), words)
+
+def directory_word_counter(pattern, words, num_workers=None, whole_word=False, task_size=TASK_SIZE):
+    """Counts how many times each word appears in every file of a directory or glob pattern.
+
+    All the files are broken into uniform byte-range tasks, and multi-member compressed files into one task per
+    member, that run on a work-stealing pool backed by processes, so one huge file is shared by all the cores
+    instead of keeping a single one busy.
+
+    Args:
+        pattern (str): The file, directory or glob pattern.
+        words (iterable): The words to count.
+        num_workers (int): The number of processes to use, defaults to the number of cores.
+        whole_word (bool): Count only the occurrences that are not part of a bigger word.
+        task_size (int): The size of every task in bytes.
+
+    Returns:
+        dict: 'total' with the counts of all the files and 'files' with the counts of every file.
+    """
+    words = list(words)
+    num_workers = num_workers or os.cpu_count()
+    paths = expand_log_paths(pattern)
+    tasks = file_tasks(paths, task_size)
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        pool = WorkStealingPool(num_workers, executor)
+        results = pool.map(directory_task_worker, [(path, start, end, member, words, whole_word) for path, start, end, member in tasks])
+
+    files = {path: dict.fromkeys(words, 0) for path in paths}
+    members = {}
+
+    for (path, start, _, member), counts in zip(tasks, results):
+        if member:
+            members.setdefault(path, {})[start] = counts
+            continue
+
+        for word, count in counts.items():
+            files[path][word] += count
+
+    #? The members of a file are stitched in file order once all of them are counted
+    for path, file_members in members.items():
+        counts = terms_to_words(stitch_members(path, compression_format(path), file_members, words, whole_word), words)
+        for word, count in counts.items():
+            files[path][word] += count
+
+    total = dict.fromkeys(words, 0)
+    for counts in files.values():
+        for word, count in counts.items():
+            total[word] += count
+
+    return {'total': total, 'files': files}
+
+class SpaceSaving:
+    """Space-Saving summary that keeps the approximate counts of the most frequent items in bounded memory.
+
+    At most 'capacity' items are kept. The count of every kept item is an overestimate of its real count by at most
+    its error, and any item whose real count is higher than the smallest kept count is guaranteed to be kept. Two
+    summaries are merged with the rule of the mergeable summaries: an item missing from a full summary is assumed
+    to have its minimum count.
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        """Creates an empty summary.
+
+        Args:
+            capacity (int): The maximum number of items kept.
+        """
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+
+    def min_count(self):
+        """Returns the count assumed for the items that are not in the summary.
+
+        Returns:
+            int: The smallest kept count if the summary is full, 0 otherwise.
+        """
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge_counts(self, counts, errors, other_min):
+        """Merges other counts into the summary and keeps only the 'capacity' biggest ones.
+
+        Args:
+            counts (dict): The counts to merge.
+            errors (dict): The errors of those counts.
+            other_min (int): The count assumed for the items missing from counts.
+        """
+        own_min = self.min_count()
+        merged_counts = {}
+        merged_errors = {}
+
+        for item in self.counts.keys() | counts.keys():
+            own_count = self.counts.get(item)
+            other_count = counts.get(item)
+
+            merged_counts[item] = (own_min if own_count is None else own_count) + (other_min if other_count is None else other_count)
+            merged_errors[item] = (
+                (own_min if own_count is None else self.errors[item])
+                + (other_min if other_count is None else errors.get(item, 0))
+            )
+
+        kept = heapq.nlargest(self.capacity, merged_counts.items(), key=operator.itemgetter(1))
+        self.counts = dict(kept)
+        self.errors = {item: merged_errors[item] for item in self.counts}
+
+    def update(self, counts):
+        """Adds the exact counts of a block of data.
+
+        Args:
+            counts (dict): The exact counts of the block.
+        """
+        self.merge_counts(counts, {}, 0)
+
+    def merge(self, other):
+        """Merges another summary into this one.
+
+        Args:
+            other (SpaceSaving): The other summary.
+
+        Returns:
+            SpaceSaving: This summary, so it can be used with tree_reduce().
+        """
+        self.merge_counts(other.counts, other.errors, other.min_count())
+        return self
+
+    def top(self, k):
+        """Returns the k items with the biggest counts.
+
+        Args:
+            k (int): The number of items.
+
+        Returns:
+            list: The (item, count, error) tuples, from the most frequent item.
+        """
+        items = heapq.nlargest(k, self.counts.items(), key=operator.itemgetter(1))
+        return [(item, count, self.errors[item]) for item, count in items]
+
+def block_items(block, field):
+    """Extracts the items counted by the top-K statistics from a block of lines.
+
+    Args:
+        block (bytes): The block of complete lines.
+        field (str): 'token' for every word of the lines, 'component' or 'level' for that field of every record.
+
+    Returns:
+        list: The items as bytes.
+    """
+    if field == 'token':
+        return TOKEN_PATTERN.findall(block.lower())
+
+    group = {'level': 6, 'component': 7}[field]
+    return [match.group(group) for match in RECORD_PATTERN.finditer(block)]
+
+def top_k_range_worker(path, start, end, field, capacity):
+    """Builds the Space-Saving summary of a byte range of a log in a worker process.
+
+    Args:
+        path (str): The path to the log.
+        start (int): The first byte of the range.
+        end (int): The byte after the last one of the range.
+        field (str): The field counted, see block_items().
+        capacity (int): The capacity of the summary.
+
+    Returns:
+        SpaceSaving: The summary of the range.
+    """
+    sketch = SpaceSaving(capacity)
+
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start, end = line_aligned_range(mm, start, end)
+            for block in iter_line_blocks(mm, start, end, TOP_K_BLOCK_SIZE):
+                sketch.update(Counter(block_items(block, field)))
+
+    return sketch
+
+def top_k_terms(path, k=10, field='token', capacity=None, num_workers=None):
+    """Finds the k most frequent tokens, components or levels of a log in bounded memory.
+
+    Every worker keeps a Space-Saving summary of its byte range and the summaries are merged at the end, so memory
+    depends on the capacity and the block size, not on the number of distinct items of the log.
+
+    Args:
+        path (str): The path to the log.
+        k (int): The number of items to return.
+        field (str): 'token', 'component' or 'level'.
+        capacity (int): The capacity of every summary, defaults to max(TOP_K_CAPACITY, 10 * k).
+        num_workers (int): The number of processes to use, defaults to the number of cores.
+
+    Returns:
+        list: The (item, count, error) tuples, from the most frequent item. The real count is between count - error and count.
+    """
+    capacity = capacity or max(TOP_K_CAPACITY, 10 * k)
+    num_workers = num_workers or os.cpu_count()
+    size = os.path.getsize(path)
+
+    if size == 0:
+        return []
+
+    if num_workers == 1 or size <= TOP_K_BLOCK_SIZE:
+        sketch = top_k_range_worker(path, 0, size, field, capacity)
+    else:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [executor.submit(top_k_range_worker, path, start, end, field, capacity) for start, end in split_byte_ranges(size, num_workers)]
+            sketch = tree_reduce([future.result() for future in futures], SpaceSaving.merge, SpaceSaving(capacity))
+
+    return [(item.decode(errors='replace'), count, error) for item, count, error in sketch.top(k)]
+
+def benchmark_whole_word(path, word):
+    """Compares the serial path of the script (readlines() and the per-line loop of word_counter()) with the
+    whole-word block scanner on one process, both starting from the path.
+
+    Args:
+        path (str): The path to the file.
+        word (str): The word to count.
+
+    Returns:
+        dict: The counts and times of both approaches and the speedup of the block scanner.
+    """
+    start_time = time.time()
+    with open(path, 'r') as f:
+        lines = f.readlines()
+    word_counter(lines, word)
+    loop_time = time.time() - start_time
+
+    reference_count = reference_whole_word_counter(lines, word)
+
+    start_time = time.time()
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        block_count = mmap_range_counter(mm, 0, len(mm), word, whole_word=True)
+    block_time = time.time() - start_time
+
+    return {
+        'reference_count': reference_count,
+        'block_count': block_count,
+        'is_correct': reference_count == block_count,
+        'loop_time': loop_time,
+        'block_time': block_time,
+        'speedup': loop_time / block_time if block_time else float('inf'),
+    }
+
+
+def benchmark_reduction(path, word, worker_counts=(1, 2, 4, 8, 16, 32)):
+    """Compares the lock-based accumulation with the future-based tree reduction as the number of workers grows.
+
+    Args:
+        path (str): The path to the file.
+        word (str): The word to count.
+        worker_counts (iterable): The numbers of threads to test.
+
+    Returns:
+        list: One dict per number of threads with the counts and times of both approaches.
+    """
+    results = []
+
+    for num_threads in worker_counts:
+        start_time = time.time()
+        locked_count = locked_word_counter(path, word, num_threads)
+        locked_time = time.time() - start_time
+
+        start_time = time.time()
+        reduced_count = parallel_word_counter(path, word, num_threads)
+        reduced_time = time.time() - start_time
+
+        results.append({
+            'num_threads': num_threads,
+            'locked_count': locked_count,
+            'reduced_count': reduced_count,
+            'locked_time': locked_time,
+            'reduced_time': reduced_time,
+        })
+
+    return results
+
+
+if __name__ == '__main__':
+    
+    path = input("Ingrese el nombre del archivo con su extension donde desea buscar: ")
+    word = input("Introduzca la palabra que deseas buscar: ")
+    
+    start_time = time.time()
+    with open_log(path) as f:
+        lines = f.readlines()
+    
+    serial_times_word_appear = word_counter(lines, word)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+
+    print(f"Numero de veces que aparece la palabra '{word}' en el archivo {path}: {serial_times_word_appear}")
+    print(f"Tiempo de ejecución en serie: {elapsed_time} segundos.")
+
+    start_time = time.time()
+    parallel_times_word_appear = parallel_word_counter(path, word)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+
+    print(f"Numero de veces que aparece la palabra '{word}' en el archivo {path}: {parallel_times_word_appear}")
+    print(f"Tiempo de ejecución en paralelo: {elapsed_time} segundos.")
+
+    start_time = time.time()
+    mmap_times_word_appear = mmap_word_counter(path, word)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+
+    print(f"Numero de veces que aparece la palabra '{word}' en el archivo {path}: {mmap_times_word_appear}")
+    print(f"Tiempo de ejecución con mmap: {elapsed_time} segundos.")
+
+    start_time = time.time()
+    process_times_word_appear = process_word_counter(path, word)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+
+    print(f"Numero de veces que aparece la palabra '{word}' en el archivo {path}: {process_times_word_appear}")
+    print(f"Tiempo de ejecución con procesos: {elapsed_time} segundos.")
+
+    if not compression_format(path):
+        benchmark = benchmark_whole_word(path, word)
+        print(f"Numero de veces que aparece la palabra completa '{word}' en el archivo {path}: {benchmark['block_count']} (referencia: {benchmark['reference_count']})")
+        print(f"Tiempo del ciclo por linea: {benchmark['loop_time']} segundos, tiempo por bloques: {benchmark['block_time']} segundos, speedup: {benchmark['speedup']:.2f}X")
+
+    print("\nHilos | Tiempo con lock | Tiempo con reduccion en arbol")
+    for row in benchmark_reduction(path, word):
+        print(f"{row['num_threads']} | {row['locked_time']:.4f} s | {row['reduced_time']:.4f} s")
 
     print("\n--------------------------------------------------------\n")
 
     print("El enfoque utilizado para mejorar el rendimiento para buscar ocurrencias de una palabra en un archivo fue:")
     print("1. Dividir el trabajo en partes iguales (chunks) y lanzar hilos basados en el número de núcleos disponibles.")
-    print("2. Crear una lista de una posicion llamada (total_count) donde se almacena la suma de todos los hilos. Se usa lista en vez de una variable porque estas permiten mutabilidad, ya que con las variables se crea una copia y se pierde la informacion almacenada anteriormente")
-    print("3. Cada hilo que se lanza ejecuta la funcion word_counter() y cuenta la ocurrencia de la palabra indicada dentro del chunk que le corresponde.")
-    print("4. Cada hilo suma el resultado obtenido de contar la ocurrencia de la palabra en la lista total_count")
-    print("5. Para evitar el Race Condition se hace uso del lock al momento en que cada hilo va a realizar la suma de su conteo local con la suma total")
\ No newline at end of file
+    print("2. Cada hilo que se lanza ejecuta la funcion word_counter() y cuenta la ocurrencia de la palabra indicada dentro del chunk que le corresponde.")
+    print("3. Cada hilo devuelve su conteo parcial a traves de un future, no hay una variable compartida entre los hilos.")
+    print("4. Se espera el resultado de todos los futures antes de devolver el total, asi ningun conteo se pierde.")
+    print("5. Los conteos parciales se combinan por pares con una reduccion en arbol (tree_reduce), sin usar locks.")
\ No newline at end of file
@@ -1,15 +1,66 @@
 import numpy as np
 import time
 from datetime import datetime
-from threading import Thread
+from threading import Thread, Lock
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
 import os
 import subprocess
 import platform
+import tempfile
 import pandas as pd
+from contextlib import ExitStack, contextmanager
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+
+CACHE_BYTES = 1024 * 1024 #* per-core cache size (L2) used to size the tiles
+TILE_CANDIDATES = (64, 128, 256, 512, 1024) #* tile sizes tried by the autotuner
+TUNE_SIZE = 1024 #* maximum size of every dimension of the autotuning sample
+TILE_SIZE_CACHE = {} #* tile size chosen for every (shape A, shape B, dtype, threads)
+OUT_OF_CORE_BLOCK = 2048 #* side of the blocks read from disk by the out-of-core multiplication
+PARALLEL_MODES = ('outer', 'inner', 'hybrid') #* ways to split the cores between Python workers and BLAS threads
+STRASSEN_CUTOFF = 512 #* size under which the Strassen recursion hands the product to BLAS
+DTYPE_MODES = ('float64', 'float32', 'int32', 'int8') #* data types supported by the multiplications
+
+#* accumulation type of every data type, small integers are accumulated in wider ones to avoid overflow
+ACCUMULATOR_DTYPES = {
+    np.dtype(np.int8): np.dtype(np.int32),
+    np.dtype(np.uint8): np.dtype(np.int32),
+    np.dtype(np.int16): np.dtype(np.int32),
+    np.dtype(np.int32): np.dtype(np.int64),
+}
+
+
+@contextmanager
+def blas_threads(num_threads):
+    """
+    Limits the number of threads used by the BLAS library inside the block.
+
+    It needs threadpoolctl, without it the block runs with the default BLAS threads.
+
+    Args:
+        num_threads (int): The number of BLAS threads, None keeps the current setting.
+    """
+    if threadpool_limits is None or num_threads is None:
+        yield
+        return
+
+    with threadpool_limits(limits=num_threads, user_api='blas'):
+        yield
 
 def multiply_matrices(A, B):
     """
-    Divides the matrix A into chunks and multiplies each chunk by matrix B in serial.
+    Divides the matrix A into chunks and multiplies each chunk by matrix B in serial, with one matrix product
+    per chunk pinned to a single BLAS thread.
 
     Args:
         A (numpy.ndarray): The first matrix.
@@ -20,20 +71,22 @@ def multiply_matrices(A, B):
     """
     num_chunks = os.cpu_count()
     size = A.shape[0]
-    result = np.zeros((size, B.shape[1]))
+    dtype = accumulator_dtype(np.result_type(A, B))
+    B = B.astype(dtype, copy=False)
+    result = np.zeros((size, B.shape[1]), dtype=dtype)
     chunk_size = size // num_chunks
     
-    for i in range(num_chunks):
-        row_start = i * chunk_size
-        if i != num_chunks - 1:
-            row_end = (i + 1) * chunk_size
-        else:
-            row_end = size
-        
-        subA = A[row_start:row_end, :]
-        
-        for j in range(subA.shape[0]):
-            result[row_start + j, :] = np.dot(subA[j, :], B)
+    #? The BLAS limit is set once for the whole loop, setting it costs about a millisecond
+    with blas_threads(1):
+        for i in range(num_chunks):
+            row_start = i * chunk_size
+            if i != num_chunks - 1:
+                row_end = (i + 1) * chunk_size
+            else:
+                row_end = size
+            
+            #? One GEMM per chunk, so the serial time does not include Python overhead per row
+            np.dot(A[row_start:row_end, :].astype(dtype, copy=False), B, out=result[row_start:row_end, :])
 
     return result
 
@@ -45,18 +98,30 @@ def parallel_worker(subA, B, result, row_start):
     
     Args:
         subA (numpy.ndarray): A subset of matrix A.
-        B (numpy.ndarray): Matrix B.
+        B (numpy.ndarray): Matrix B, already in the accumulation type of the result.
         result (numpy.ndarray): The matrix where the results are stored.
         row_start (int): The row index where the results should be stored.
     
     """
-    sub_result = np.dot(subA, B)
+    #? The chunk is converted to the accumulation type inside the thread, so the conversion also runs in parallel
+    sub_result = np.dot(subA.astype(result.dtype, copy=False), B)
     
     #? Store the results in the corresponding part of the 'result' matrix
     #? Example: If sub_result.shape = (2, 10) and row_start = 0, then the results should be stored in result[0:2, :], it means from row 0 to row 1. and all columns.
     result[row_start:row_start + sub_result.shape[0], :] = sub_result
 
 
+def accumulated_dot(subA, B, out):
+    """
+    Multiplies a block of rows by B in the accumulation type of out, converting the block inside the calling thread.
+
+    Args:
+        subA (numpy.ndarray): A block of rows of matrix A.
+        B (numpy.ndarray): Matrix B, already in the type of out.
+        out (numpy.ndarray): The block of the result where the product is written.
+    """
+    np.dot(subA.astype(out.dtype, copy=False), B, out=out)
+
 
 def parallel_matrix_without_join(A, B, num_threads):
     """
@@ -72,7 +137,9 @@ def parallel_matrix_without_join(A, B, num_threads):
     """
     
     size = A.shape[0]
-    result = np.zeros((size, size))
+    dtype = accumulator_dtype(np.result_type(A, B))
+    B = B.astype(dtype, copy=False)
+    result = np.zeros((size, B.shape[1]), dtype=dtype)
     chunk_size = size // num_threads
 
     threads = []
@@ -94,7 +161,7 @@ def parallel_matrix_without_join(A, B, num_threads):
 
     return result
 
-def parallel_matrix_multiply(A, B, num_threads):
+def parallel_matrix_multiply(A, B, num_threads, num_blas_threads=None):
     """
     Release multiples threads to multiply rows of matrix A with matrix B and store the results in "results matrix".
 
@@ -102,13 +169,17 @@ def parallel_matrix_multiply(A, B, num_threads):
         A (numpy.ndarray): The first matrix.
         B (numpy.ndarray): The second matrix.
         num_threads (int): The number of threads to use.
+        num_blas_threads (int): The number of BLAS threads used by every np.dot, None keeps the BLAS default
+            (which with many threads can oversubscribe the cores).
 
     Returns:
         numpy.ndarray: The result of multiplying matrices A and B.
     """
     
     size = A.shape[0]
-    result = np.zeros((size, size))
+    dtype = accumulator_dtype(np.result_type(A, B))
+    B = B.astype(dtype, copy=False)
+    result = np.zeros((size, B.shape[1]), dtype=dtype)
     chunk_size = size // num_threads
 
     threads = []
@@ -126,13 +197,1242 @@ def parallel_matrix_multiply(A, B, num_threads):
 
         thread = Thread(target=parallel_worker, args=(subA, B, result, row_start))
         threads.append(thread)
-        thread.start()
 
-    for thread in threads:
-        thread.join()
+    #? The BLAS limit is global to the process, so it is set once around all the workers
+    with blas_threads(num_blas_threads):
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
         
     return result
 
+def default_tile_size(itemsize):
+    """
+    Computes a tile size such that one tile of A, one of B and one of C fit together in the cache.
+
+    Args:
+        itemsize (int): The size in bytes of one element of the matrices.
+
+    Returns:
+        int: The side of a square tile, a multiple of 64.
+    """
+    side = int((CACHE_BYTES / (3 * itemsize)) ** 0.5)
+    return max(64, side // 64 * 64)
+
+
+def tiled_worker(A, B, result, row_start, row_end, col_start, col_end, tile_size):
+    """
+    Computes one tile of the result, accumulating the products of the tiles of A and B along the inner dimension.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix.
+        result (numpy.ndarray): The matrix where the results are stored.
+        row_start (int): The first row of the tile.
+        row_end (int): The row after the last one of the tile.
+        col_start (int): The first column of the tile.
+        col_end (int): The column after the last one of the tile.
+        tile_size (int): The size of the blocks of the inner dimension.
+    """
+    #? Each task owns its tile of C, so the accumulation needs no synchronization
+    tile = result[row_start:row_end, col_start:col_end]
+    partial = np.empty_like(tile)
+
+    for k_start in range(0, A.shape[1], tile_size):
+        k_end = min(k_start + tile_size, A.shape[1])
+        np.dot(A[row_start:row_end, k_start:k_end], B[k_start:k_end, col_start:col_end], out=partial)
+        tile += partial
+
+
+def tiled_matrix_multiply(A, B, num_threads, tile_size=None):
+    """
+    Splits A, B and the result into cache-sized tiles and schedules the tile products over a pool of threads.
+
+    Every task computes one tile of the result (2D split of C) looping over the tiles of the inner dimension
+    (third dimension), so a thread only streams the panels of A and B it needs instead of all of B. np.dot releases
+    the GIL, so the tasks run in parallel.
+
+    Args:
+        A (numpy.ndarray): The first matrix, of shape (m, k).
+        B (numpy.ndarray): The second matrix, of shape (k, n).
+        num_threads (int): The number of threads to use.
+        tile_size (int): The side of the tiles, None uses autotune_tile_size().
+
+    Returns:
+        numpy.ndarray: The result of multiplying matrices A and B, of shape (m, n).
+
+    Raises:
+        ValueError: If the columns of A do not match the rows of B.
+    """
+    if A.shape[1] != B.shape[0]:
+        raise ValueError(f"Formas no validas para la multiplicacion: {A.shape} y {B.shape}")
+
+    rows, cols = A.shape[0], B.shape[1]
+    dtype = accumulator_dtype(np.result_type(A, B))
+    A = A.astype(dtype, copy=False)
+    B = B.astype(dtype, copy=False)
+    result = np.zeros((rows, cols), dtype=dtype)
+
+    if tile_size is None:
+        tile_size = autotune_tile_size(A.shape, B.shape, dtype, num_threads)
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [
+            executor.submit(tiled_worker, A, B, result, row_start, min(row_start + tile_size, rows), col_start, min(col_start + tile_size, cols), tile_size)
+            for row_start in range(0, rows, tile_size)
+            for col_start in range(0, cols, tile_size)
+        ]
+        for future in futures:
+            future.result()
+
+    return result
+
+
+def autotune_tile_size(shape_a, shape_b, dtype, num_threads, candidates=TILE_CANDIDATES):
+    """
+    Chooses the fastest tile size by timing the tiled multiplication of a sample of the problem.
+
+    The sample keeps the proportions of the real matrices but is limited to TUNE_SIZE per dimension, and the
+    result is cached for the same shapes, data type and number of threads.
+
+    Args:
+        shape_a (tuple): The shape of A.
+        shape_b (tuple): The shape of B.
+        dtype (numpy.dtype): The data type of the matrices.
+        num_threads (int): The number of threads to use.
+        candidates (tuple): The tile sizes to try.
+
+    Returns:
+        int: The fastest tile size.
+    """
+    key = (shape_a, shape_b, np.dtype(dtype).str, num_threads)
+    if key in TILE_SIZE_CACHE:
+        return TILE_SIZE_CACHE[key]
+
+    m, k, n = (min(dim, TUNE_SIZE) for dim in (shape_a[0], shape_a[1], shape_b[1]))
+    sample_a = np.random.rand(m, k).astype(dtype)
+    sample_b = np.random.rand(k, n).astype(dtype)
+
+    best_size, best_time = default_tile_size(np.dtype(dtype).itemsize), float('inf')
+    for tile_size in candidates:
+        if tile_size > max(m, k, n) and tile_size != candidates[0]:
+            continue
+
+        start_time = time.time()
+        tiled_matrix_multiply(sample_a, sample_b, num_threads, tile_size)
+        elapsed_time = time.time() - start_time
+
+        if elapsed_time < best_time:
+            best_size, best_time = tile_size, elapsed_time
+
+    TILE_SIZE_CACHE[key] = best_size
+    return best_size
+
+
+def benchmark_tiled(shapes, num_threads):
+    """
+    Compares the row-strip parallel multiplication with the tiled engine.
+
+    Args:
+        shapes (list): The (m, k, n) shapes to test, A is (m, k) and B is (k, n).
+        num_threads (int): The number of threads to use.
+
+    Returns:
+        pandas.DataFrame: The times, the chosen tile size and the speedup of the tiled engine for every shape.
+    """
+    rows = []
+
+    for m, k, n in shapes:
+        A = np.random.rand(m, k)
+        B = np.random.rand(k, n)
+        tile_size = autotune_tile_size(A.shape, B.shape, A.dtype, num_threads)
+
+        start_time = time.time()
+        result_strips = parallel_matrix_multiply(A, B, num_threads)
+        strips_time = time.time() - start_time
+
+        start_time = time.time()
+        result_tiled = tiled_matrix_multiply(A, B, num_threads, tile_size)
+        tiled_time = time.time() - start_time
+
+        rows.append({
+            "**Shape (m, k, n)**": f"({m}, {k}, {n})",
+            "**Tile Size**": tile_size,
+            "**Row Strips Time (s)**": round(strips_time, 3),
+            "**Tiled Time (s)**": round(tiled_time, 3),
+            "**Is Correct**": str(np.allclose(result_strips, result_tiled)),
+            "**Speedup**": strips_time / tiled_time,
+        })
+
+    return pd.DataFrame(rows)
+
+class SharedMatrix:
+    """
+    A numpy matrix stored in a shared memory segment, so worker processes can read and write it without copies.
+
+    Only its spec (segment name, shape and data type) is sent to the workers, which attach to the segment.
+    """
+
+    def __init__(self, shm, shape, dtype):
+        """
+        Wraps a shared memory segment as a matrix, use create(), from_array() or attach() instead.
+
+        Args:
+            shm (multiprocessing.shared_memory.SharedMemory): The segment.
+            shape (tuple): The shape of the matrix.
+            dtype (numpy.dtype): The data type of the matrix.
+        """
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype=np.float64):
+        """
+        Allocates a new matrix in shared memory, the caller must call unlink() when it is not needed anymore.
+
+        Args:
+            shape (tuple): The shape of the matrix.
+            dtype (numpy.dtype): The data type of the matrix.
+
+        Returns:
+            SharedMatrix: The new matrix, its contents are not initialized.
+        """
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        return cls(shm, shape, dtype)
+
+    @classmethod
+    def from_array(cls, array):
+        """
+        Copies an array into a new shared matrix.
+
+        Args:
+            array (numpy.ndarray): The array to copy.
+
+        Returns:
+            SharedMatrix: The new matrix.
+        """
+        matrix = cls.create(array.shape, array.dtype)
+        matrix.array[...] = array
+        return matrix
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        Opens a matrix created by another process.
+
+        Args:
+            spec (tuple): The (name, shape, dtype) returned by the spec property.
+
+        Returns:
+            SharedMatrix: The matrix.
+        """
+        name, shape, dtype = spec
+        return cls(shared_memory.SharedMemory(name=name), shape, dtype)
+
+    @property
+    def spec(self):
+        """
+        The (name, shape, dtype) tuple that identifies the matrix in other processes.
+        """
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        """
+        Detaches this process from the segment.
+        """
+        self.array = None
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Detaches from the segment and destroys it.
+        """
+        self.close()
+        self.shm.unlink()
+
+
+def shared_memory_worker(spec_a, spec_b, spec_result, row_start, row_end, num_blas_threads):
+    """
+    Multiplies a block of rows of A by B inside a worker process, writing straight into the shared result.
+
+    The operands are converted to the type of the result (the accumulation type), so small integers do not overflow.
+
+    Args:
+        spec_a (tuple): The spec of the shared matrix A.
+        spec_b (tuple): The spec of the shared matrix B.
+        spec_result (tuple): The spec of the shared result.
+        row_start (int): The first row of the block.
+        row_end (int): The row after the last one of the block.
+        num_blas_threads (int): The number of BLAS threads of the worker.
+    """
+    A, B, result = (SharedMatrix.attach(spec) for spec in (spec_a, spec_b, spec_result))
+
+    try:
+        with blas_threads(num_blas_threads):
+            dtype = result.array.dtype
+            subA = A.array[row_start:row_end, :].astype(dtype, copy=False)
+            np.dot(subA, B.array.astype(dtype, copy=False), out=result.array[row_start:row_end, :])
+    finally:
+        for matrix in (A, B, result):
+            matrix.close()
+
+
+def shared_memory_matrix_multiply(A, B, num_workers, out=None, num_blas_threads=1):
+    """
+    Multiplies A and B with a pool of processes that share A, B and the result through shared memory.
+
+    Only the specs of the segments and the row offsets are pickled. A, B and out can be SharedMatrix objects to
+    avoid any copy; plain arrays are copied once into temporary segments.
+
+    Args:
+        A (numpy.ndarray or SharedMatrix): The first matrix.
+        B (numpy.ndarray or SharedMatrix): The second matrix.
+        num_workers (int): The number of processes to use.
+        out (SharedMatrix): Where the result is written, None returns a new numpy array.
+        num_blas_threads (int): The number of BLAS threads of every worker.
+
+    Returns:
+        numpy.ndarray: The result of multiplying matrices A and B (the array of out when it is given).
+    """
+    temporary = []
+
+    def shared(matrix):
+        if isinstance(matrix, SharedMatrix):
+            return matrix
+        temporary.append(SharedMatrix.from_array(matrix))
+        return temporary[-1]
+
+    try:
+        A, B = shared(A), shared(B)
+        size = A.array.shape[0]
+
+        if out is None:
+            out = SharedMatrix.create((size, B.array.shape[1]), accumulator_dtype(np.result_type(A.array, B.array)))
+            temporary.append(out)
+
+        chunk_size = size // num_workers
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = []
+            for i in range(num_workers):
+                row_start = i * chunk_size
+
+                #? The last worker multiplies the remaining rows
+                if i != num_workers - 1:
+                    row_end = (i + 1) * chunk_size
+                else:
+                    row_end = size
+
+                futures.append(executor.submit(shared_memory_worker, A.spec, B.spec, out.spec, row_start, row_end, num_blas_threads))
+
+            for future in futures:
+                future.result()
+
+        return out.array.copy() if out in temporary else out.array
+    finally:
+        for matrix in temporary:
+            matrix.unlink()
+
+
+def save_random_matrix(path, shape, dtype=np.float64, block_rows=OUT_OF_CORE_BLOCK):
+    """
+    Writes a random matrix to a .npy file block by block, so it can be bigger than the memory.
+
+    Args:
+        path (str): The path of the .npy file.
+        shape (tuple): The shape of the matrix.
+        dtype (numpy.dtype): The data type of the matrix.
+        block_rows (int): The number of rows generated at a time.
+    """
+    matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+
+    for row_start in range(0, shape[0], block_rows):
+        row_end = min(row_start + block_rows, shape[0])
+        matrix[row_start:row_end, :] = np.random.rand(row_end - row_start, shape[1])
+
+    matrix.flush()
+    del matrix
+
+
+def out_of_core_worker(A, B, result, row_start, row_end, col_start, col_end, block_size, reader):
+    """
+    Computes one tile of an out-of-core product, reading the next pair of panels while the current one is multiplied.
+
+    Args:
+        A (numpy.memmap): The first matrix, on disk.
+        B (numpy.memmap): The second matrix, on disk.
+        result (numpy.memmap): The result, on disk.
+        row_start (int): The first row of the tile.
+        row_end (int): The row after the last one of the tile.
+        col_start (int): The first column of the tile.
+        col_end (int): The column after the last one of the tile.
+        block_size (int): The size of the blocks of the inner dimension.
+        reader (ThreadPoolExecutor): The pool that prefetches the panels from disk.
+    """
+    def read_panels(k_start):
+        k_end = min(k_start + block_size, A.shape[1])
+        subA = np.array(A[row_start:row_end, k_start:k_end], dtype=result.dtype)
+        return subA, np.array(B[k_start:k_end, col_start:col_end], dtype=result.dtype)
+
+    tile = np.zeros((row_end - row_start, col_end - col_start), dtype=result.dtype)
+    partial = np.empty_like(tile)
+    k_starts = range(0, A.shape[1], block_size)
+
+    panels = reader.submit(read_panels, k_starts[0]) if k_starts else None
+
+    for i, k_start in enumerate(k_starts):
+        subA, subB = panels.result()
+
+        #? The next panels are read from disk while this pair is multiplied
+        if i + 1 < len(k_starts):
+            panels = reader.submit(read_panels, k_starts[i + 1])
+
+        np.dot(subA, subB, out=partial)
+        tile += partial
+
+    result[row_start:row_end, col_start:col_end] = tile
+
+
+def out_of_core_matrix_multiply(path_a, path_b, path_result, num_threads, block_size=OUT_OF_CORE_BLOCK, num_readers=2):
+    """
+    Multiplies two matrices stored in .npy files that may not fit in memory and writes the result to another .npy file.
+
+    A, B and the result are opened with np.memmap. The result is split into tiles of block_size x block_size that are
+    computed in parallel; every tile reads its panels of A and B block by block through a prefetch pool, so the
+    reads overlap with the products. Memory use is about num_threads * 5 blocks.
+
+    Args:
+        path_a (str): The .npy file of the first matrix.
+        path_b (str): The .npy file of the second matrix.
+        path_result (str): The .npy file where the result is written.
+        num_threads (int): The number of threads computing tiles.
+        block_size (int): The side of the blocks read from disk.
+        num_readers (int): The number of threads reading panels from disk.
+
+    Returns:
+        numpy.memmap: The result, mapped from path_result.
+
+    Raises:
+        ValueError: If the matrices are not 2D or the columns of A do not match the rows of B.
+    """
+    A = np.load(path_a, mmap_mode='r')
+    B = np.load(path_b, mmap_mode='r')
+
+    #? Checked before open_memmap() creates the result file
+    if A.ndim != 2 or B.ndim != 2 or A.shape[1] != B.shape[0]:
+        raise ValueError(f"Formas no validas para la multiplicacion: {A.shape} y {B.shape}")
+
+    rows, cols = A.shape[0], B.shape[1]
+
+    result = np.lib.format.open_memmap(path_result, mode='w+', dtype=accumulator_dtype(np.result_type(A, B)), shape=(rows, cols))
+
+    with ThreadPoolExecutor(max_workers=num_readers) as reader, ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [
+            executor.submit(out_of_core_worker, A, B, result, row_start, min(row_start + block_size, rows), col_start, min(col_start + block_size, cols), block_size, reader)
+            for row_start in range(0, rows, block_size)
+            for col_start in range(0, cols, block_size)
+        ]
+        for future in futures:
+            future.result()
+
+    result.flush()
+    return result
+
+
+def thread_split(mode, num_cores=None, num_blas_threads=None):
+    """
+    Splits the cores between Python worker threads and BLAS threads, so workers * BLAS threads never exceeds the cores.
+
+    Args:
+        mode (str): 'outer' (one BLAS thread per worker, one worker per core), 'inner' (one worker using all the
+            cores through BLAS) or 'hybrid' (several workers with several BLAS threads each).
+        num_cores (int): The number of cores to use, defaults to all of them.
+        num_blas_threads (int): The BLAS threads per worker in hybrid mode, defaults to the biggest divisor of the
+            cores that is not bigger than its square root.
+
+    Returns:
+        tuple: (number of workers, BLAS threads per worker).
+    """
+    num_cores = num_cores or os.cpu_count()
+
+    if mode == 'outer':
+        return num_cores, 1
+    if mode == 'inner':
+        return 1, num_cores
+    if mode != 'hybrid':
+        raise ValueError(f"Modo de paralelismo no valido: {mode}. Use uno de {PARALLEL_MODES}")
+
+    if num_blas_threads is None:
+        num_blas_threads = max(d for d in range(1, int(num_cores ** 0.5) + 1) if num_cores % d == 0)
+
+    num_blas_threads = min(num_blas_threads, num_cores)
+    return max(1, num_cores // num_blas_threads), num_blas_threads
+
+
+def configured_matrix_multiply(A, B, mode='outer', num_cores=None, num_blas_threads=None):
+    """
+    Multiplies A and B with parallel_matrix_multiply() after splitting the cores between workers and BLAS threads.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix.
+        mode (str): 'outer', 'inner' or 'hybrid', see thread_split().
+        num_cores (int): The number of cores to use, defaults to all of them.
+        num_blas_threads (int): The BLAS threads per worker in hybrid mode.
+
+    Returns:
+        numpy.ndarray: The result of multiplying matrices A and B.
+    """
+    num_workers, num_blas_threads = thread_split(mode, num_cores, num_blas_threads)
+    return parallel_matrix_multiply(A, B, num_workers, num_blas_threads)
+
+
+def benchmark_parallel_modes(shape, num_cores=None, repeat=3):
+    """
+    Times every split of the cores between workers and BLAS threads for a matrix shape and picks the fastest one.
+
+    Every divisor d of the cores is tried as d workers with cores // d BLAS threads, which covers the inner
+    (d = 1), outer (d = cores) and hybrid modes.
+
+    Args:
+        shape (tuple): The (m, k, n) shape, A is (m, k) and B is (k, n).
+        num_cores (int): The number of cores to use, defaults to all of them.
+        repeat (int): The number of runs of every split, the best one is kept.
+
+    Returns:
+        tuple: The pandas.DataFrame with the time of every split and the fastest (mode, workers, BLAS threads).
+    """
+    num_cores = num_cores or os.cpu_count()
+    m, k, n = shape
+    A = np.random.rand(m, k)
+    B = np.random.rand(k, n)
+
+    rows = []
+    for num_workers in (d for d in range(1, num_cores + 1) if num_cores % d == 0):
+        num_blas_threads = num_cores // num_workers
+
+        if num_workers == num_cores:
+            mode = 'outer'
+        elif num_workers == 1:
+            mode = 'inner'
+        else:
+            mode = 'hybrid'
+
+        best_time = float('inf')
+        for _ in range(repeat):
+            start_time = time.time()
+            parallel_matrix_multiply(A, B, num_workers, num_blas_threads)
+            best_time = min(best_time, time.time() - start_time)
+
+        rows.append({
+            "**Mode**": mode,
+            "**Workers**": num_workers,
+            "**BLAS Threads**": num_blas_threads,
+            "**Time (s)**": round(best_time, 4),
+        })
+
+    best = min(rows, key=lambda row: row["**Time (s)**"])
+    return pd.DataFrame(rows), (best["**Mode**"], best["**Workers**"], best["**BLAS Threads**"])
+
+
+class MatmulEngine:
+    """
+    Long-lived multiplication engine for services that perform many products.
+
+    It keeps a persistent pool of worker threads and a pool of result buffers, so a call does not pay for creating
+    threads or for page-faulting a new result matrix. Results taken from the buffer pool can be returned with
+    release() to be reused by the next calls.
+
+    The BLAS thread limit (num_blas_threads) is process-wide, as every threadpoolctl limit: while the engine is open
+    it also applies to every other BLAS call of the process, and close() restores the limits found when the engine
+    was created, so engines with a limit must be closed in the reverse order they were created.
+    """
+
+    def __init__(self, num_threads=None, num_blas_threads=None):
+        """
+        Starts the worker threads.
+
+        Args:
+            num_threads (int): The number of worker threads, defaults to the number of cores.
+            num_blas_threads (int): The BLAS threads of the whole process while the engine is open, None (the
+                default) leaves the BLAS settings untouched.
+        """
+        self.num_threads = num_threads or os.cpu_count()
+        self.executor = ThreadPoolExecutor(max_workers=self.num_threads)
+        self.buffers = {}
+        self.buffers_lock = Lock()
+
+        #? The BLAS limit is set once for the whole life of the engine instead of on every call, only when asked for
+        self.settings = ExitStack()
+        self.settings.enter_context(blas_threads(num_blas_threads))
+
+    def get_buffer(self, shape, dtype):
+        """
+        Takes a buffer of the given shape and type from the pool, or allocates one if there is none.
+
+        Args:
+            shape (tuple): The shape of the buffer.
+            dtype (numpy.dtype): The data type of the buffer.
+
+        Returns:
+            numpy.ndarray: The buffer, its contents are not initialized.
+        """
+        key = (tuple(shape), np.dtype(dtype).str)
+
+        with self.buffers_lock:
+            free = self.buffers.get(key)
+            if free:
+                return free.pop()
+
+        return np.empty(shape, dtype=dtype)
+
+    def release(self, buffer):
+        """
+        Returns a result to the buffer pool, the caller must not use it anymore.
+
+        Args:
+            buffer (numpy.ndarray): The buffer.
+        """
+        key = (buffer.shape, buffer.dtype.str)
+
+        with self.buffers_lock:
+            self.buffers.setdefault(key, []).append(buffer)
+
+    def multiply(self, A, B, out=None):
+        """
+        Multiplies A and B splitting the rows of A between the worker threads.
+
+        Args:
+            A (numpy.ndarray): The first matrix.
+            B (numpy.ndarray): The second matrix.
+            out (numpy.ndarray): A C-contiguous array of shape (rows of A, columns of B) and the accumulation type
+                where the result is written, None takes one from the buffer pool.
+
+        Returns:
+            numpy.ndarray: The result of multiplying matrices A and B.
+        """
+        size = A.shape[0]
+        if out is None:
+            out = self.get_buffer((size, B.shape[1]), accumulator_dtype(np.result_type(A, B)))
+        B = B.astype(out.dtype, copy=False)
+
+        num_chunks = max(1, min(self.num_threads, size))
+        chunk_size = size // num_chunks
+
+        futures = []
+        for i in range(num_chunks):
+            row_start = i * chunk_size
+
+            #? The last chunk takes the remaining rows
+            if i != num_chunks - 1:
+                row_end = (i + 1) * chunk_size
+            else:
+                row_end = size
+
+            futures.append(self.executor.submit(accumulated_dot, A[row_start:row_end, :], B, out[row_start:row_end, :]))
+
+        for future in futures:
+            future.result()
+
+        return out
+
+    def batched_multiply(self, A, B, out=None):
+        """
+        Multiplies stacks of matrices with batched_matrix_multiply() on the worker threads of the engine.
+
+        Args:
+            A (numpy.ndarray): The stack of first matrices, of shape (N, m, k).
+            B (numpy.ndarray): The stack of second matrices, of shape (N, k, n) or (k, n).
+            out (numpy.ndarray): Where the result is written, None takes one from the buffer pool.
+
+        Returns:
+            numpy.ndarray: The stack of products, of shape (N, m, n).
+        """
+        if out is None:
+            out = self.get_buffer((A.shape[0], A.shape[1], B.shape[-1]), accumulator_dtype(np.result_type(A, B)))
+
+        return batched_matrix_multiply(A, B, self.num_threads, out, self.executor)
+
+    def close(self):
+        """
+        Stops the worker threads and restores the BLAS threads.
+        """
+        self.executor.shutdown()
+        self.settings.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def batched_matrix_multiply(A, B, num_threads=None, out=None, executor=None):
+    """
+    Multiplies stacks of small matrices, splitting the batch into slices that run in parallel with np.matmul.
+
+    The matrices can be rectangular: A is (N, m, k) and B is (N, k, n), or (k, n) to multiply every matrix of A
+    by the same B.
+
+    Args:
+        A (numpy.ndarray): The stack of first matrices, of shape (N, m, k).
+        B (numpy.ndarray): The stack of second matrices, of shape (N, k, n) or (k, n).
+        num_threads (int): The number of slices, defaults to the number of cores.
+        out (numpy.ndarray): A C-contiguous array of shape (N, m, n) where the result is written.
+        executor (ThreadPoolExecutor): The pool that runs the slices, None creates a temporary one.
+
+    Returns:
+        numpy.ndarray: The stack of products, of shape (N, m, n).
+    """
+    if A.ndim != 3 or B.ndim not in (2, 3) or (B.ndim == 3 and B.shape[0] != A.shape[0]):
+        raise ValueError(f"Formas no validas para la multiplicacion por lotes: {A.shape} y {B.shape}")
+
+    num_threads = num_threads or os.cpu_count()
+    batch = A.shape[0]
+
+    if out is None:
+        out = np.empty((batch, A.shape[1], B.shape[-1]), dtype=accumulator_dtype(np.result_type(A, B)))
+
+    num_slices = max(1, min(num_threads, batch))
+    slice_size = batch // num_slices
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=num_slices)
+
+    try:
+        futures = []
+        for i in range(num_slices):
+            start = i * slice_size
+
+            #? The last slice takes the remaining matrices
+            if i != num_slices - 1:
+                end = (i + 1) * slice_size
+            else:
+                end = batch
+
+            subB = B[start:end] if B.ndim == 3 else B
+            #? dtype makes np.matmul compute in the accumulation type instead of the type of the operands
+            futures.append(executor.submit(np.matmul, A[start:end], subB, out=out[start:end], dtype=out.dtype))
+
+        for future in futures:
+            future.result()
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    return out
+
+
+def benchmark_batched(batch, m, k, n, num_threads=None, num_looped=1000):
+    """
+    Compares the throughput of looping parallel_matrix_multiply() over every pair with batched_matrix_multiply().
+
+    Args:
+        batch (int): The number of products of the batched run.
+        m (int): The rows of every matrix of A.
+        k (int): The columns of A and rows of B.
+        n (int): The columns of every matrix of B.
+        num_threads (int): The number of threads, defaults to the number of cores.
+        num_looped (int): The number of pairs of the looped run, it is much slower.
+
+    Returns:
+        pandas.DataFrame: The products per second of every approach.
+    """
+    num_threads = num_threads or os.cpu_count()
+    A = np.random.rand(batch, m, k)
+    B = np.random.rand(batch, k, n)
+    num_looped = min(num_looped, batch)
+
+    #? The BLAS limit is set once for both runs, so the looped run does not time a threadpoolctl call per pair
+    with blas_threads(1):
+        start_time = time.time()
+        for i in range(num_looped):
+            parallel_matrix_multiply(A[i], B[i], num_threads)
+        looped_time = time.time() - start_time
+
+        start_time = time.time()
+        result = batched_matrix_multiply(A, B, num_threads)
+        batched_time = time.time() - start_time
+
+    return pd.DataFrame({
+        "**Approach**": ["parallel_matrix_multiply() per pair", "batched_matrix_multiply()"],
+        "**Products per Second**": [round(num_looped / looped_time), round(batch / batched_time)],
+        "**Is Correct**": ["-", str(np.allclose(result, np.matmul(A, B)))],
+    })
+
+
+def benchmark_engine_latency(size=256, num_calls=1000, num_threads=None):
+    """
+    Compares the latency per call of parallel_matrix_multiply() with a MatmulEngine that reuses threads and buffers.
+
+    Args:
+        size (int): The size of the square matrices.
+        num_calls (int): The number of products of every approach.
+        num_threads (int): The number of threads, defaults to the number of cores.
+
+    Returns:
+        pandas.DataFrame: The average latency of every approach in milliseconds.
+    """
+    num_threads = num_threads or os.cpu_count()
+    A = np.random.rand(size, size)
+    B = np.random.rand(size, size)
+
+    #? The BLAS limit is set once for the whole loop, like the engine does once in __init__, so neither side
+    #? times a threadpoolctl call per product
+    with blas_threads(1):
+        start_time = time.time()
+        for _ in range(num_calls):
+            parallel_matrix_multiply(A, B, num_threads)
+        threads_latency = (time.time() - start_time) / num_calls
+
+    with MatmulEngine(num_threads, num_blas_threads=1) as engine:
+        out = engine.get_buffer((size, size), A.dtype)
+
+        start_time = time.time()
+        for _ in range(num_calls):
+            engine.multiply(A, B, out=out)
+        engine_latency = (time.time() - start_time) / num_calls
+
+    return pd.DataFrame({
+        "**Approach**": ["parallel_matrix_multiply()", "MatmulEngine.multiply()"],
+        "**Latency per Call (ms)**": [round(threads_latency * 1000, 4), round(engine_latency * 1000, 4)],
+    })
+
+
+def strassen_product(A, B, cutoff, executor=None, depth=0, parallel_depth=1):
+    """
+    Multiplies A and B with the Strassen-Winograd recursion (7 products and 15 additions per level).
+
+    Odd dimensions are padded with a zero row or column. Below the cutoff the product is done by np.dot (BLAS).
+    While depth < parallel_depth the seven sub-products are submitted to the executor.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix.
+        cutoff (int): The size under which np.dot is used.
+        executor (ThreadPoolExecutor): The pool for the sub-products, None computes them in this thread.
+        depth (int): The current level of the recursion.
+        parallel_depth (int): The number of levels whose sub-products run in parallel.
+
+    Returns:
+        numpy.ndarray: The result of multiplying matrices A and B.
+    """
+    m, k = A.shape
+    n = B.shape[1]
+
+    if min(m, k, n) <= cutoff:
+        return np.dot(A, B)
+
+    #? Pad the odd dimensions so the matrices can be split in four equal blocks
+    if m % 2 or k % 2 or n % 2:
+        padded_a = np.zeros((m + m % 2, k + k % 2), dtype=A.dtype)
+        padded_b = np.zeros((k + k % 2, n + n % 2), dtype=B.dtype)
+        padded_a[:m, :k] = A
+        padded_b[:k, :n] = B
+        return strassen_product(padded_a, padded_b, cutoff, executor, depth, parallel_depth)[:m, :n]
+
+    hm, hk, hn = m // 2, k // 2, n // 2
+    A11, A12, A21, A22 = A[:hm, :hk], A[:hm, hk:], A[hm:, :hk], A[hm:, hk:]
+    B11, B12, B21, B22 = B[:hk, :hn], B[:hk, hn:], B[hk:, :hn], B[hk:, hn:]
+
+    S1 = A21 + A22
+    S2 = S1 - A11
+    S3 = A11 - A21
+    S4 = A12 - S2
+    T1 = B12 - B11
+    T2 = B22 - T1
+    T3 = B22 - B12
+    T4 = T2 - B21
+
+    pairs = [(A11, B11), (A12, B21), (S4, B22), (A22, T4), (S1, T1), (S2, T2), (S3, T3)]
+
+    if executor is not None and depth < parallel_depth:
+        futures = [executor.submit(strassen_product, X, Y, cutoff, executor, depth + 1, parallel_depth) for X, Y in pairs]
+        M1, M2, M3, M4, M5, M6, M7 = (future.result() for future in futures)
+    else:
+        M1, M2, M3, M4, M5, M6, M7 = (strassen_product(X, Y, cutoff) for X, Y in pairs)
+
+    result = np.empty((m, n), dtype=M1.dtype)
+    U2 = M1 + M6
+    U3 = U2 + M7
+    U4 = U2 + M5
+
+    np.add(M1, M2, out=result[:hm, :hn])
+    np.add(U4, M3, out=result[:hm, hn:])
+    np.subtract(U3, M4, out=result[hm:, :hn])
+    np.add(U3, M5, out=result[hm:, hn:])
+
+    return result
+
+
+def strassen_matrix_multiply(A, B, num_threads, cutoff=STRASSEN_CUTOFF, parallel_depth=1):
+    """
+    Multiplies A and B with the Strassen-Winograd algorithm, running the sub-products of the first levels in parallel.
+
+    The pool has one thread for every task that waits for its sub-products plus 7 ** parallel_depth threads for the
+    leaves, so a waiting task can never block the tasks it waits for.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix.
+        num_threads (int): The number of threads for the leaves, defaults to 7 ** parallel_depth when None.
+        cutoff (int): The size under which np.dot is used.
+        parallel_depth (int): The number of levels whose seven sub-products run in parallel.
+
+    Returns:
+        numpy.ndarray: The result of multiplying matrices A and B.
+    """
+    waiting = sum(7 ** level for level in range(1, parallel_depth))
+    leaves = num_threads or 7 ** parallel_depth
+
+    #? The additions of the recursion overflow too, so the operands are converted to the accumulation type first
+    dtype = accumulator_dtype(np.result_type(A, B))
+    A = A.astype(dtype, copy=False)
+    B = B.astype(dtype, copy=False)
+
+    with ThreadPoolExecutor(max_workers=waiting + max(leaves, 1)) as executor:
+        return strassen_product(A, B, cutoff, executor, 0, parallel_depth)
+
+
+def strassen_error_report(sizes, cutoff=STRASSEN_CUTOFF, num_threads=None):
+    """
+    Measures the numerical error of the Strassen-Winograd multiplication against np.dot.
+
+    Args:
+        sizes (list): The sizes of the square matrices.
+        cutoff (int): The size under which np.dot is used.
+        num_threads (int): The number of threads, defaults to the number of cores.
+
+    Returns:
+        pandas.DataFrame: The maximum absolute error and the relative (Frobenius) error for every size.
+    """
+    num_threads = num_threads or os.cpu_count()
+    rows = []
+
+    for size in sizes:
+        A = np.random.rand(size, size)
+        B = np.random.rand(size, size)
+        expected = np.dot(A, B)
+        difference = strassen_matrix_multiply(A, B, num_threads, cutoff) - expected
+
+        rows.append({
+            "**Matrix Size**": size,
+            "**Levels**": max(0, int(np.ceil(np.log2(size / cutoff)))),
+            "**Max Absolute Error**": float(np.abs(difference).max()),
+            "**Relative Error**": float(np.linalg.norm(difference) / np.linalg.norm(expected)),
+        })
+
+    return pd.DataFrame(rows)
+
+
+def benchmark_strassen(sizes, num_threads=None, cutoff=STRASSEN_CUTOFF):
+    """
+    Compares parallel_matrix_multiply() with the Strassen-Winograd multiplication to find where it starts to win.
+
+    Args:
+        sizes (list): The sizes of the square matrices, from the smallest.
+        num_threads (int): The number of threads, defaults to the number of cores.
+        cutoff (int): The size under which np.dot is used.
+
+    Returns:
+        tuple: The pandas.DataFrame with the times and the first size where Strassen is faster (None if it never is).
+    """
+    num_threads = num_threads or os.cpu_count()
+    rows = []
+    crossover = None
+
+    for size in sizes:
+        A = np.random.rand(size, size)
+        B = np.random.rand(size, size)
+
+        start_time = time.time()
+        parallel_matrix_multiply(A, B, num_threads)
+        parallel_time = time.time() - start_time
+
+        start_time = time.time()
+        strassen_matrix_multiply(A, B, num_threads, cutoff)
+        strassen_time = time.time() - start_time
+
+        if crossover is None and strassen_time < parallel_time:
+            crossover = size
+
+        rows.append({
+            "**Matrix Size**": size,
+            "**Parallel Time (s)**": round(parallel_time, 3),
+            "**Strassen Time (s)**": round(strassen_time, 3),
+            "**Speedup**": parallel_time / strassen_time,
+        })
+
+    return pd.DataFrame(rows), crossover
+
+
+def balanced_row_partition(indptr, num_parts):
+    """
+    Splits the rows of a CSR matrix into blocks with about the same number of nonzeros, not the same number of rows.
+
+    Args:
+        indptr (numpy.ndarray): The row pointer of the CSR matrix.
+        num_parts (int): The number of blocks.
+
+    Returns:
+        list: The (row_start, row_end) blocks, empty blocks are skipped.
+    """
+    rows = len(indptr) - 1
+    targets = indptr[-1] * np.arange(1, num_parts) / num_parts
+    bounds = [0] + [int(bound) for bound in np.searchsorted(indptr, targets, side='left')] + [rows]
+
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def sparse_worker(A, B, result, row_start, row_end):
+    """
+    Multiplies a block of rows of a CSR matrix by B.
+
+    Args:
+        A (scipy.sparse.csr_matrix): The first matrix.
+        B (scipy.sparse matrix or numpy.ndarray): The second matrix.
+        result (numpy.ndarray): The dense result where the block is written, None to return the block instead.
+        row_start (int): The first row of the block.
+        row_end (int): The row after the last one of the block.
+
+    Returns:
+        The block of the product (CSR for a sparse B) when result is None.
+    """
+    block = A[row_start:row_end] @ B
+
+    if result is None:
+        return sparse.csr_matrix(block)
+
+    if sparse.issparse(block):
+        block.toarray(out=result[row_start:row_end, :])
+    else:
+        result[row_start:row_end, :] = block
+
+
+def sparse_matrix_multiply(A, B, num_threads, output='csr'):
+    """
+    Multiplies a sparse matrix A by a sparse (SpGEMM) or dense (SpMM) matrix B in parallel.
+
+    The rows of A are split by number of nonzeros with balanced_row_partition(), so every thread gets the same
+    amount of work even when the nonzeros are concentrated in a few rows. It needs scipy.
+
+    Args:
+        A (scipy.sparse matrix): The first matrix, converted to CSR if needed.
+        B (scipy.sparse matrix or numpy.ndarray): The second matrix.
+        num_threads (int): The number of threads to use.
+        output (str): 'csr' for a sparse result or 'dense' for a numpy array.
+
+    Returns:
+        scipy.sparse.csr_matrix or numpy.ndarray: The result of multiplying matrices A and B.
+    """
+    if sparse is None:
+        raise ImportError("Se necesita el paquete 'scipy' para la multiplicacion de matrices dispersas")
+    if output not in ('csr', 'dense'):
+        raise ValueError(f"Formato de salida no valido: {output}. Use 'csr' o 'dense'")
+
+    A = sparse.csr_matrix(A)
+    if sparse.issparse(B):
+        B = sparse.csr_matrix(B)
+
+    blocks = balanced_row_partition(A.indptr, num_threads)
+    result = np.zeros((A.shape[0], B.shape[1]), dtype=np.result_type(A.dtype, B.dtype)) if output == 'dense' else None
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [executor.submit(sparse_worker, A, B, result, row_start, row_end) for row_start, row_end in blocks]
+        pieces = [future.result() for future in futures]
+
+    if output == 'dense':
+        return result
+
+    if not pieces:
+        return sparse.csr_matrix((A.shape[0], B.shape[1]), dtype=np.result_type(A.dtype, B.dtype))
+
+    return sparse.vstack(pieces, format='csr')
+
+
+def benchmark_sparse(size, density, num_threads=None):
+    """
+    Compares the sparse multiplication with densifying the matrices and using parallel_matrix_multiply().
+
+    Args:
+        size (int): The size of the square matrices.
+        density (float): The fraction of nonzeros, e.g. 0.05 for 95% zeros.
+        num_threads (int): The number of threads, defaults to the number of cores.
+
+    Returns:
+        pandas.DataFrame: The time and the memory of the operands and result of every approach.
+    """
+    num_threads = num_threads or os.cpu_count()
+    A = sparse.random(size, size, density=density, format='csr')
+    B = sparse.random(size, size, density=density, format='csr')
+
+    def csr_bytes(matrix):
+        return matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+
+    start_time = time.time()
+    dense_a, dense_b = A.toarray(), B.toarray()
+    dense_result = parallel_matrix_multiply(dense_a, dense_b, num_threads)
+    dense_time = time.time() - start_time
+
+    start_time = time.time()
+    sparse_result = sparse_matrix_multiply(A, B, num_threads, 'csr')
+    sparse_time = time.time() - start_time
+
+    return pd.DataFrame({
+        "**Approach**": ["Densify + parallel_matrix_multiply()", "sparse_matrix_multiply()"],
+        "**Time (s)**": [round(dense_time, 4), round(sparse_time, 4)],
+        "**Memory (MB)**": [
+            round((dense_a.nbytes + dense_b.nbytes + dense_result.nbytes) / 2 ** 20, 2),
+            round((csr_bytes(A) + csr_bytes(B) + csr_bytes(sparse_result)) / 2 ** 20, 2),
+        ],
+        "**Is Correct**": ["-", str(np.allclose(sparse_result.toarray(), dense_result))],
+    })
+
+
+def accumulator_dtype(dtype):
+    """
+    Chooses the type used to accumulate the products of a data type, so integer products do not overflow.
+
+    Args:
+        dtype (numpy.dtype): The data type of the operands.
+
+    Returns:
+        numpy.dtype: The accumulation (and result) type.
+    """
+    dtype = np.dtype(dtype)
+    return ACCUMULATOR_DTYPES.get(dtype, dtype)
+
+
+def random_matrix(shape, dtype=np.float64):
+    """
+    Creates a random matrix of a data type: values in [0, 1) for floats, the whole range for int8 and
+    [-100, 100) for wider integers.
+
+    Args:
+        shape (tuple): The shape of the matrix.
+        dtype (numpy.dtype): The data type of the matrix.
+
+    Returns:
+        numpy.ndarray: The random matrix.
+    """
+    dtype = np.dtype(dtype)
+
+    if dtype.kind == 'f':
+        return np.random.rand(*shape).astype(dtype)
+
+    info = np.iinfo(dtype)
+    low, high = (info.min, info.max + 1) if dtype.itemsize == 1 else (-100, 100)
+    return np.random.randint(low, high, size=shape, dtype=dtype)
+
+
+def results_match(expected, actual, dtype, inner_size):
+    """
+    Compares two results with the tolerance of their data type.
+
+    Integer results must be equal. Float results may differ by the rounding of the inner_size products summed for
+    every element, about sqrt(inner_size) * epsilon of the accumulation type, relative to the biggest value.
+
+    Args:
+        expected (numpy.ndarray): The reference result.
+        actual (numpy.ndarray): The result to check.
+        dtype (numpy.dtype): The data type of the operands.
+        inner_size (int): The inner dimension of the product (columns of A).
+
+    Returns:
+        bool: True if the results match.
+    """
+    accumulator = accumulator_dtype(dtype)
+
+    if accumulator.kind in 'iu':
+        return bool(np.array_equal(expected, actual))
+
+    tolerance = 10 * np.finfo(accumulator).eps * np.sqrt(max(inner_size, 1))
+    scale = float(np.abs(expected).max()) if expected.size else 0.0
+    return bool(np.allclose(actual, expected, rtol=tolerance, atol=tolerance * scale))
+
+
+def check_dtype_backends(dtype, size=64, num_threads=2):
+    """
+    Checks with results_match() that every backend accumulates a data type without overflow.
+
+    Args:
+        dtype (numpy.dtype): The data type of the operands.
+        size (int): The size of the square matrices.
+        num_threads (int): The number of threads or processes of every backend.
+
+    Returns:
+        dict: Whether the result of every backend is correct.
+    """
+    A = random_matrix((size, size), dtype)
+    B = random_matrix((size, size), dtype)
+    expected = np.dot(A.astype(np.float64), B.astype(np.float64))
+    stack_a, stack_b = A.reshape(4, size // 4, size), B[:, :size // 2]
+
+    with MatmulEngine(num_threads) as engine:
+        results = {
+            "shared_memory": shared_memory_matrix_multiply(A, B, num_threads),
+            "engine": engine.multiply(A, B).copy(),
+            "batched": batched_matrix_multiply(stack_a, stack_b, num_threads).reshape(size, size // 2),
+            "strassen": strassen_matrix_multiply(A, B, num_threads, cutoff=size // 4),
+        }
+
+    with tempfile.TemporaryDirectory() as directory:
+        np.save(os.path.join(directory, "a.npy"), A)
+        np.save(os.path.join(directory, "b.npy"), B)
+        result = out_of_core_matrix_multiply(os.path.join(directory, "a.npy"), os.path.join(directory, "b.npy"), os.path.join(directory, "c.npy"), num_threads, block_size=size // 2)
+        results["out_of_core"] = np.array(result)
+        del result
+
+    expected_batched = expected[:, :size // 2]
+    return {
+        name: results_match(expected_batched if name == "batched" else expected, result, dtype, size)
+        for name, result in results.items()
+    }
+
+
+def benchmark_dtypes(size, num_threads=None, dtypes=DTYPE_MODES):
+    """
+    Measures the throughput of parallel_matrix_multiply() for every data type.
+
+    Args:
+        size (int): The size of the square matrices.
+        num_threads (int): The number of threads, defaults to the number of cores.
+        dtypes (tuple): The data types to test.
+
+    Returns:
+        pandas.DataFrame: The time, the GFLOP/s (2 * size ** 3 operations) and the correctness of every data type,
+        also for the other backends (check_dtype_backends()).
+    """
+    num_threads = num_threads or os.cpu_count()
+    rows = []
+
+    for dtype in dtypes:
+        A = random_matrix((size, size), dtype)
+        B = random_matrix((size, size), dtype)
+
+        #? The BLAS limit is set outside the timer, so the GFLOP/s do not include a threadpoolctl call
+        with blas_threads(1):
+            start_time = time.time()
+            result = parallel_matrix_multiply(A, B, num_threads)
+            elapsed_time = time.time() - start_time
+
+        expected = np.dot(A.astype(np.float64), B.astype(np.float64))
+
+        rows.append({
+            "**Data Type**": dtype,
+            "**Accumulator**": str(accumulator_dtype(dtype)),
+            "**Time (s)**": round(elapsed_time, 4),
+            "**GFLOP/s**": round(2 * size ** 3 / elapsed_time / 1e9, 2),
+            "**Is Correct**": str(results_match(expected, result, dtype, size)),
+            "**Backends Correct**": str(all(check_dtype_backends(dtype).values())),
+        })
+
+    return pd.DataFrame(rows)
+
+
 def test():
 
     num_threads = os.cpu_count()
@@ -147,8 +1447,13 @@ def test():
         except ValueError:
             print("Por favor, ingrese un número entero válido.")
 
-    A = np.random.rand(size, size)
-    B = np.random.rand(size, size)
+    dtype = input(f"Ingrese el tipo de dato {DTYPE_MODES} (por defecto float64): ").strip() or 'float64'
+    if dtype not in DTYPE_MODES:
+        print("Tipo de dato inválido, se usará float64.")
+        dtype = 'float64'
+
+    A = random_matrix((size, size), dtype)
+    B = random_matrix((size, size), dtype)
 
     #? Serial multiplication
     serial_start_time = time.time()
@@ -174,24 +1479,40 @@ def test():
     parallel_without_join_time = parallel_without_join_end_time - parallel_without_join_start_time
     print(f"Multiplicación en paralelo sin join completada en {parallel_without_join_time:.4f} segundos.")
 
+    #? Parallel multiplication with cache-sized tiles, the tile size is tuned before the timer so the sample
+    #? products of the autotuner are not measured
+    tile_size = autotune_tile_size(A.shape, B.shape, accumulator_dtype(np.result_type(A, B)), num_threads)
+    tiled_start_time = time.time()
+    result_tiled = tiled_matrix_multiply(A, B, num_threads, tile_size)
+    tiled_end_time = time.time()
+
+    tiled_time = tiled_end_time - tiled_start_time
+    print(f"Multiplicación en paralelo por bloques completada en {tiled_time:.4f} segundos.")
+
     #? Check between parallel with join
-    is_correct_with_join = np.allclose(result_serial, result_parallel)
-    is_correct_without_join = np.allclose(result_serial, result_parallel_without_join)
+    is_correct_with_join = results_match(result_serial, result_parallel, dtype, size)
+    is_correct_without_join = results_match(result_serial, result_parallel_without_join, dtype, size)
+    is_correct_tiled = results_match(result_serial, result_tiled, dtype, size)
 
     #? Speedup analysis
     speedup_with_join = serial_time / parallel_time
     speedup_without_join = serial_time / parallel_without_join_time
+    speedup_tiled = serial_time / tiled_time
 
     results = {
         "**Matrix Size**": [size],
+        "**Data Type**": [dtype],
         "**Number of Threads**": [num_threads],
         "**Serial Time (s)**": [round(serial_time, 3)],
         "**Parallel Time with Join (s)**": [round(parallel_time, 3)],
         "**Parallel Time without Join (s)**": [round(parallel_without_join_time, 3)],
+        "**Tiled Time (s)**": [round(tiled_time, 3)],
         "**Is Correct with Join**": [str(is_correct_with_join)],
         "**Is Correct without Join**": [str(is_correct_without_join)],
+        "**Is Correct Tiled**": [str(is_correct_tiled)],
         "**Speedup with Join**": [speedup_with_join],
-        "**Speedup without Join**": [speedup_without_join]
+        "**Speedup without Join**": [speedup_without_join],
+        "**Speedup Tiled**": [speedup_tiled]
     }
 
     df = pd.DataFrame(results)
@@ -229,10 +1550,11 @@ explore how to improve the performance of the operation by using multiple thread
 
 The following methodology was used to carry out this analysis:
 
-- **multiply_matrices()**: It uses the numpy library to multiply two matrices.
+- **multiply_matrices()**: It multiplies two matrices in serial, one matrix product per chunk of A on a single BLAS thread.
 - **parallel_worker()**: Multiplies rows of matrix A with matrix B and stores the results in the corresponding part of the 'result' matrix.
 - **parallel_matrix_without_join()**: It divides matrix A into submatrices and multiplies each submatrix by matrix B in parallel without using the 'join()' synchronization.
 - **parallel_matrix_multiply()**: It divides matrix A into submatrices and multiplies each submatrix by matrix B in parallel using the 'join()' synchronization.
+- **tiled_matrix_multiply()**: It splits A, B and the result into cache-sized tiles (size chosen by autotune_tile_size()) and schedules the tile products over a pool of threads.
 - **test()**: It performs the tests and prints the results.
 
 # Test Results
@@ -253,7 +1575,7 @@ of data corruption, as threads may overwrite parts of the result matrix before a
 synchronization leads to incorrect results, highlighting the importance of proper thread management.
 
 - Impact on Results: The results indicate that parallel matrix multiplication without join() produces incorrect results, as 
-verified by the np.allclose() function. This discrepancy underscores the necessity of using join() to ensure that all threads 
+verified by the results_match() function, which compares float results with the tolerance of their data type and integer results exactly. This discrepancy underscores the necessity of using join() to ensure that all threads 
 have completed their tasks and that results are correctly aggregated into the final matrix.
 
 # Conclusion
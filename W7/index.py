@@ -1,4 +1,9 @@
+from collections import deque
+from concurrent.futures import CancelledError, Future
 from datetime import datetime
+import itertools
+import json
+import logging
 import os
 import platform
 import subprocess
@@ -7,6 +12,12 @@ import queue
 import numpy as np
 import time
 import matplotlib.pyplot as plt
+from contextlib import contextmanager
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
 
 #? Variables globales
 GLOBAL_QUEUE = queue.Queue(maxsize=10) #* global queue, used to store chunks of the matrix
@@ -15,18 +26,335 @@ stop_event = threading.Event() #* stop event, used to notify consumers to stop
 
 result = None #* global variable to store the results of the matrix multiplication
 
-producer_wait_times = [] #* list to store producer wait times
-consumer_wait_times = [] #* list to store consumer wait times
 
-fill_count = 0 #* counter to keep track of how many times the queue was full
-empty_count = 0 #* counter to keep track of how many times the queue was empty
+STOP = None #* sentinel item, a consumer that takes it from the queue stops
 
 max_threads = os.cpu_count()
 min_threads = 1
 
+SCALE_INTERVAL = 0.05 #* seconds between two decisions of the consumer pool
+SCALE_UP_OCCUPANCY = 0.75 #* queue occupancy from which the pool adds a consumer
+SCALE_DOWN_IDLE = 0.5 #* fraction of the interval the consumers spent waiting from which the pool retires one
+
+SCHEDULES = ('static', 'guided', 'factoring') #* chunk schedules of the producer
+PROBE_ROWS = 8 #* rows the guided producer multiplies itself to measure the compute time per row
+MIN_CHUNK_TIME = 0.002 #* seconds of compute of the smallest chunk, so the queue overhead stays negligible
+SERVICE_CHUNK_ROWS = 64 #* rows per chunk of the MatrixService jobs
+SERVICE_METRICS_HISTORY = 1000 #* metrics of the last finished jobs kept by a MatrixService
+
+#* accumulation type of every data type, small integers are accumulated in wider ones to avoid overflow
+ACCUMULATOR_DTYPES = {
+    np.dtype(np.int8): np.dtype(np.int32),
+    np.dtype(np.uint8): np.dtype(np.int32),
+    np.dtype(np.int16): np.dtype(np.int32),
+    np.dtype(np.int32): np.dtype(np.int64),
+}
+HISTOGRAM_SUB_BUCKET_BITS = 8 #* log-linear histogram precision, buckets are 2 ** -7 (< 1%) of their value wide
+METRICS_PREFIX = "matmul_pipeline" #* prefix of the exported Prometheus metrics
+METRICS_INTERVALS = 10_000 #* compute intervals kept per thread to measure the concurrency
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def blas_threads(num_threads):
+    """
+    Limits the number of threads used by the BLAS library inside the block.
+
+    It needs threadpoolctl, without it the block runs with the default BLAS threads.
+
+    Args:
+        num_threads (int): The number of BLAS threads, None keeps the current setting.
+    """
+    if threadpool_limits is None or num_threads is None:
+        yield
+        return
+
+    with threadpool_limits(limits=num_threads, user_api='blas'):
+        yield
+
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of latencies in nanoseconds.
+
+    The buckets are log-linear: values under 2 ** HISTOGRAM_SUB_BUCKET_BITS have a bucket each, bigger values share
+    buckets 2 ** -(HISTOGRAM_SUB_BUCKET_BITS - 1) of their value wide, so any percentile is within 1% of the real
+    one while the histogram only stores the buckets it used.
+    """
+
+    def __init__(self):
+        self.counts = {} #* bucket index -> number of values
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def bucket_index(value):
+        sub_buckets = 1 << HISTOGRAM_SUB_BUCKET_BITS
+        if value < sub_buckets:
+            return value
+
+        half = sub_buckets >> 1
+        shift = value.bit_length() - HISTOGRAM_SUB_BUCKET_BITS
+        return sub_buckets + (shift - 1) * half + (value >> shift) - half
+
+    @staticmethod
+    def bucket_upper(index):
+        sub_buckets = 1 << HISTOGRAM_SUB_BUCKET_BITS
+        if index < sub_buckets:
+            return index
+
+        half = sub_buckets >> 1
+        shift = (index - sub_buckets) // half + 1
+        mantissa = (index - sub_buckets) % half + half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        """
+        Adds a latency in nanoseconds.
+        """
+        index = self.bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        """
+        Adds the values of another histogram.
+        """
+        for index, count in other.counts.copy().items():
+            self.counts[index] = self.counts.get(index, 0) + count
+
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, percent):
+        """
+        Returns the latency in nanoseconds under which percent % of the values are.
+        """
+        if not self.count:
+            return 0
+
+        target = self.count * percent / 100
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self.bucket_upper(index), self.max)
+
+        return self.max
+
+    def summary(self):
+        """
+        Returns the count and the mean, min, max, p50, p90, p99 and p99.9 latencies in seconds.
+        """
+        return {
+            "count": self.count,
+            "sum": self.total / 1e9,
+            "mean": self.total / self.count / 1e9 if self.count else 0.0,
+            "min": (self.min or 0) / 1e9,
+            "max": self.max / 1e9,
+            "p50": self.percentile(50) / 1e9,
+            "p90": self.percentile(90) / 1e9,
+            "p99": self.percentile(99) / 1e9,
+            "p99.9": self.percentile(99.9) / 1e9,
+        }
+
+
+class ThreadMetrics:
+    """
+    Counters, histograms, last compute intervals and finish time of one thread, only that thread writes them.
+    """
+
+    def __init__(self, thread_name):
+        self.thread_name = thread_name
+        self.counters = {}
+        self.histograms = {}
+        self.intervals = deque(maxlen=METRICS_INTERVALS) #* (start, end) of the last products, in nanoseconds
+        self.finish_time = None #* time the consumer took its STOP item, in nanoseconds
+
+
+class PipelineMetrics:
+    """
+    Metrics of the producer/consumer pipeline.
+
+    Every thread writes its own ThreadMetrics, so recording takes no lock. snapshot() merges them when the metrics
+    are exported: the copies of the dictionaries are atomic under the GIL, so a snapshot taken while the pipeline
+    runs may miss the values being recorded but never blocks the threads.
+
+    Histograms (nanoseconds): producer_wait and consumer_wait (time blocked on a full or empty queue), queue_wait
+    (chunk ready to chunk taken), compute (the product) and end_to_end (chunk ready to product written).
+
+    Counters: chunks_produced, chunks_consumed, queue_full and queue_empty.
+
+    Every consumer also keeps its last METRICS_INTERVALS compute intervals and its finish time, used to measure the
+    concurrency (compute_intervals()) and the tail of a job (finish_times()).
+
+    With enabled=False count(), observe(), interval() and finish() return right away. The messages of trace() are only logged with
+    tracing=True.
+    """
+
+    def __init__(self, enabled=True, tracing=False):
+        self.enabled = enabled
+        self.tracing = tracing
+        self.reset()
+
+    def reset(self):
+        """
+        Drops the metrics of every thread.
+        """
+        self._local = threading.local()
+        self._threads = []
+
+    def _thread_metrics(self):
+        metrics = getattr(self._local, "metrics", None)
+        if metrics is None:
+            metrics = self._local.metrics = ThreadMetrics(threading.current_thread().name)
+            self._threads.append(metrics)
+        return metrics
+
+    def count(self, name, amount=1):
+        """
+        Adds amount to a counter of the calling thread.
+        """
+        if not self.enabled:
+            return
+
+        counters = self._thread_metrics().counters
+        counters[name] = counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        """
+        Records a latency in nanoseconds in a histogram of the calling thread.
+        """
+        if not self.enabled:
+            return
+
+        histograms = self._thread_metrics().histograms
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = LatencyHistogram()
+        histogram.record(value)
+
+    def interval(self, start, end):
+        """
+        Records the (start, end) time in nanoseconds of a product of the calling thread.
+        """
+        if not self.enabled:
+            return
+
+        self._thread_metrics().intervals.append((start, end))
+
+    def finish(self, timestamp):
+        """
+        Records the time in nanoseconds the calling consumer stopped.
+        """
+        if not self.enabled:
+            return
+
+        self._thread_metrics().finish_time = timestamp
+
+    def compute_intervals(self):
+        """
+        Returns the recorded compute intervals of every thread.
+        """
+        return [interval for metrics in list(self._threads) for interval in metrics.intervals.copy()]
+
+    def finish_times(self):
+        """
+        Returns the finish time of every consumer that stopped.
+        """
+        return [metrics.finish_time for metrics in list(self._threads) if metrics.finish_time is not None]
+
+    def trace(self, message, *args):
+        """
+        Logs a message of every chunk, only with tracing=True.
+        """
+        if self.tracing:
+            logger.info(message, *args)
+
+    def totals(self, name):
+        """
+        Returns the number of values and their sum in nanoseconds of a histogram over every thread, without merging
+        the buckets.
+        """
+        count = 0
+        total = 0
+        for metrics in list(self._threads):
+            histogram = metrics.histograms.get(name)
+            if histogram is not None:
+                count += histogram.count
+                total += histogram.total
+        return count, total
+
+    def snapshot(self):
+        """
+        Merges the metrics of every thread.
+
+        Returns:
+            tuple: The counters, the histograms and the counters of every thread by thread name.
+        """
+        counters = {}
+        histograms = {}
+        per_thread = {}
+
+        for metrics in list(self._threads):
+            thread_counters = metrics.counters.copy()
+            per_thread[metrics.thread_name] = thread_counters
+
+            for name, value in thread_counters.items():
+                counters[name] = counters.get(name, 0) + value
+            for name, histogram in metrics.histograms.copy().items():
+                histograms.setdefault(name, LatencyHistogram()).merge(histogram)
+
+        return counters, histograms, per_thread
+
+    def to_json(self):
+        """
+        Exports the metrics as JSON, latencies in seconds.
+        """
+        counters, histograms, per_thread = self.snapshot()
+        return json.dumps({
+            "counters": counters,
+            "histograms": {name: histogram.summary() for name, histogram in histograms.items()},
+            "threads": per_thread,
+        }, indent=2)
+
+    def to_prometheus(self):
+        """
+        Exports the metrics in the Prometheus text format: counters as <prefix>_<name>_total and histograms as
+        <prefix>_<name>_seconds summaries.
+        """
+        counters, histograms, _ = self.snapshot()
+        lines = []
+
+        for name, value in sorted(counters.items()):
+            lines.append(f"# TYPE {METRICS_PREFIX}_{name}_total counter")
+            lines.append(f"{METRICS_PREFIX}_{name}_total {value}")
+
+        for name, histogram in sorted(histograms.items()):
+            metric = f"{METRICS_PREFIX}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for quantile in (0.5, 0.9, 0.99, 0.999):
+                lines.append(f'{metric}{{quantile="{quantile}"}} {histogram.percentile(quantile * 100) / 1e9:.9f}')
+            lines.append(f"{metric}_sum {histogram.total / 1e9:.9f}")
+            lines.append(f"{metric}_count {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+pipeline_metrics = PipelineMetrics() #* metrics of the global pipeline, tracing off
+
 def serial_multiply_matrices(A, B, chunk_size):
     """
-    Divides the matrix A into chunks and multiplies each chunk by matrix B in serial.
+    Divides the matrix A into chunks and multiplies each chunk by matrix B in serial, with one matrix product
+    per chunk pinned to a single BLAS thread.
 
     Args:
         A (numpy.ndarray): The first matrix.
@@ -43,17 +371,17 @@ def serial_multiply_matrices(A, B, chunk_size):
     result = np.zeros((size, B.shape[1]))
     chunk_size = size // num_chunks
     
-    for i in range(num_chunks):
-        row_start = i * chunk_size
-        if i != num_chunks - 1:
-            row_end = (i + 1) * chunk_size
-        else:
-            row_end = size
-        
-        subA = A[row_start:row_end, :]
-        
-        for j in range(subA.shape[0]):
-            result[row_start + j, :] = np.dot(subA[j, :], B)
+    #? The BLAS limit is set once for the whole loop, setting it costs about a millisecond
+    with blas_threads(1):
+        for i in range(num_chunks):
+            row_start = i * chunk_size
+            if i != num_chunks - 1:
+                row_end = (i + 1) * chunk_size
+            else:
+                row_end = size
+            
+            #? One GEMM per chunk, so the serial time does not include Python overhead per row
+            np.dot(A[row_start:row_end, :], B, out=result[row_start:row_end, :])
 
     return result
 
@@ -71,11 +399,11 @@ def split_matrix(A, chunk_size):
     
     return chunks
 
-def producer(A, num_threads):
+def condition_producer(A, num_threads):
     """
-    Producer adds the chunks of matrix A to the global queue.
+    Producer adds the chunks of matrix A to the global queue, synchronized with the condition variable.
     """
-    global GLOBAL_QUEUE, fill_count
+    global GLOBAL_QUEUE
 
     size = A.shape[0]
     chunk_size = size // num_threads
@@ -84,23 +412,24 @@ def producer(A, num_threads):
     for subA, start_row in chunks:
         with condition:
             while GLOBAL_QUEUE.full():
-                start_time = time.time()
-                print("Cola llena, productor esperando...")
-                fill_count += 1
+                start_time = time.perf_counter_ns()
+                pipeline_metrics.trace("Cola llena, productor esperando...")
+                pipeline_metrics.count("queue_full")
                 condition.wait()
-                producer_wait_times.append(time.time() - start_time)
+                pipeline_metrics.observe("producer_wait", time.perf_counter_ns() - start_time)
             GLOBAL_QUEUE.put((subA, start_row))
-            print(f"Se ha agregado el chunk de filas: {start_row} a {start_row + subA.shape[0] - 1} a la cola")
+            pipeline_metrics.count("chunks_produced")
+            pipeline_metrics.trace("Se ha agregado el chunk de filas: %d a %d a la cola", start_row, start_row + subA.shape[0] - 1)
             condition.notify()
     stop_event.set()
     with condition:
         condition.notify_all()
 
-def consumer(B):
+def condition_consumer(B):
     """
-    Consumer takes chunks from the global queue and multiplies them by matrix B.
+    Consumer takes chunks from the global queue and multiplies them by matrix B, holding the condition lock.
     """
-    global GLOBAL_QUEUE, result, empty_count
+    global GLOBAL_QUEUE, result
     
     while True:
         with condition:
@@ -109,20 +438,773 @@ def consumer(B):
                 if stop_event.is_set():
                     return
                 
-                start_time = time.time()
-                print("Cola vacía, consumidor esperando...")
-                empty_count += 1
+                start_time = time.perf_counter_ns()
+                pipeline_metrics.trace("Cola vacía, consumidor esperando...")
+                pipeline_metrics.count("queue_empty")
                 condition.wait()
-                consumer_wait_times.append(time.time() - start_time)
+                pipeline_metrics.observe("consumer_wait", time.perf_counter_ns() - start_time)
 
             subA, row_start = GLOBAL_QUEUE.get()
 
-            print(f"Consumidor procesa chunk de filas {row_start} a {row_start + subA.shape[0] - 1}")
+            pipeline_metrics.trace("Consumidor procesa chunk de filas %d a %d", row_start, row_start + subA.shape[0] - 1)
+            compute_start = time.perf_counter_ns()
             result_chunk = np.dot(subA, B)
+            compute_end = time.perf_counter_ns()
+            pipeline_metrics.interval(compute_start, compute_end)
+            pipeline_metrics.count("chunks_consumed")
+            pipeline_metrics.observe("compute", compute_end - compute_start)
 
             result[row_start:row_start + subA.shape[0], :] = result_chunk
             condition.notify()
 
+
+def producer(A, num_threads, num_consumers=None):
+    """
+    Producer adds the chunks of matrix A to the global queue and then one STOP item per consumer.
+
+    The queue is the only synchronization point: put() blocks while the queue is full, so no condition variable is
+    needed.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        num_threads (int): The number of chunks to split A into.
+        num_consumers (int): The number of consumers to stop, defaults to num_threads.
+    """
+    size = A.shape[0]
+    chunk_size = max(size // num_threads, 1)
+    chunks = split_matrix(A, chunk_size)
+
+    for subA, start_row in chunks:
+        enqueue_chunk(subA, start_row)
+
+    for _ in range(num_threads if num_consumers is None else num_consumers):
+        GLOBAL_QUEUE.put(STOP)
+
+def consumer(B):
+    """
+    Consumer takes chunks from the global queue and multiplies them by matrix B until it takes a STOP item.
+
+    The product runs outside any lock and is written straight into its own rows of the result, which no other
+    consumer touches.
+    """
+    while True:
+        item = dequeue_chunk()
+
+        if item is STOP:
+            pipeline_metrics.finish(time.perf_counter_ns())
+            return
+
+        multiply_chunk(item, B)
+
+def enqueue_chunk(subA, start_row):
+    """
+    Puts a chunk in the global queue with the time it was ready, recording the wait if the queue is full.
+    """
+    item = (subA, start_row, time.perf_counter_ns())
+
+    try:
+        GLOBAL_QUEUE.put_nowait(item)
+    except queue.Full:
+        start_time = time.perf_counter_ns()
+        pipeline_metrics.trace("Cola llena, productor esperando...")
+        pipeline_metrics.count("queue_full")
+        GLOBAL_QUEUE.put(item)
+        pipeline_metrics.observe("producer_wait", time.perf_counter_ns() - start_time)
+
+    pipeline_metrics.count("chunks_produced")
+    pipeline_metrics.trace("Se ha agregado el chunk de filas: %d a %d a la cola", start_row, start_row + subA.shape[0] - 1)
+
+def dequeue_chunk(timeout=None):
+    """
+    Takes an item from the global queue, recording the wait if the queue is empty.
+
+    Raises:
+        queue.Empty: If the queue is still empty after timeout seconds.
+    """
+    try:
+        return GLOBAL_QUEUE.get_nowait()
+    except queue.Empty:
+        start_time = time.perf_counter_ns()
+        pipeline_metrics.trace("Cola vacía, consumidor esperando...")
+        pipeline_metrics.count("queue_empty")
+        try:
+            return GLOBAL_QUEUE.get(timeout=timeout)
+        finally:
+            pipeline_metrics.observe("consumer_wait", time.perf_counter_ns() - start_time)
+
+def multiply_chunk(item, B):
+    """
+    Multiplies a chunk taken from the queue by matrix B and writes it into its rows of the global result.
+    """
+    subA, row_start, ready_time = item
+    row_end = row_start + subA.shape[0]
+
+    pipeline_metrics.trace("Consumidor procesa chunk de filas %d a %d", row_start, row_end - 1)
+    taken_time = time.perf_counter_ns()
+    np.dot(subA, B, out=result[row_start:row_end, :])
+    end_time = time.perf_counter_ns()
+
+    pipeline_metrics.count("chunks_consumed")
+    pipeline_metrics.interval(taken_time, end_time)
+    pipeline_metrics.observe("queue_wait", taken_time - ready_time)
+    pipeline_metrics.observe("compute", end_time - taken_time)
+    pipeline_metrics.observe("end_to_end", end_time - ready_time)
+
+def schedule_chunk_sizes(num_rows, num_consumers, min_chunk, schedule='factoring'):
+    """
+    Computes the sizes of the chunks of a self-scheduled job, big chunks first and smaller ones toward the end.
+
+    - guided: every chunk takes 1 / num_consumers of the remaining rows.
+    - factoring: the rows are handed out in batches of num_consumers equal chunks, each batch covering half of the
+      remaining rows, which keeps the first chunks smaller than guided and the consumers better balanced.
+    - static: num_consumers equal chunks, the last one takes the remainder (like producer()).
+
+    Args:
+        num_rows (int): The number of rows of the job.
+        num_consumers (int): The number of consumers.
+        min_chunk (int): The smallest chunk size.
+        schedule (str): One of SCHEDULES.
+
+    Returns:
+        list: The size of every chunk, in order.
+    """
+    if schedule not in SCHEDULES:
+        raise ValueError(f"Planificación inválida: {schedule}. Use una de {SCHEDULES}")
+
+    if schedule == 'static':
+        chunk_size = max(num_rows // num_consumers, 1)
+        return [min(chunk_size, num_rows - start) for start in range(0, num_rows, chunk_size)]
+
+    sizes = []
+    remaining = num_rows
+
+    while remaining > 0:
+        if schedule == 'guided':
+            batch = [max(-(-remaining // num_consumers), min_chunk)]
+        else:
+            batch = [max(-(-remaining // (2 * num_consumers)), min_chunk)] * num_consumers
+
+        for chunk_size in batch:
+            chunk_size = min(chunk_size, remaining)
+            if chunk_size == 0:
+                break
+            sizes.append(chunk_size)
+            remaining -= chunk_size
+
+    return sizes
+
+def measure_row_time(A, B):
+    """
+    Multiplies the first PROBE_ROWS rows of A by B into the global result and measures the time per row.
+
+    Returns:
+        tuple: The number of rows multiplied and the seconds per row.
+    """
+    probe_rows = min(PROBE_ROWS, A.shape[0])
+
+    start_time = time.time()
+    np.dot(A[:probe_rows, :], B, out=result[:probe_rows, :])
+    elapsed_time = time.time() - start_time
+
+    return probe_rows, elapsed_time / probe_rows
+
+def guided_producer(A, B, num_consumers, schedule='factoring'):
+    """
+    Producer that self-schedules the chunks of matrix A: it measures the compute time per row on the first rows,
+    derives the smallest chunk from MIN_CHUNK_TIME and emits chunks that shrink toward the end of the job, so the
+    consumers finish close together instead of waiting on one oversized tail chunk.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix, only used to measure the compute time.
+        num_consumers (int): The number of consumers to feed and stop.
+        schedule (str): One of SCHEDULES.
+    """
+    probe_rows, row_time = measure_row_time(A, B)
+    min_chunk = max(int(MIN_CHUNK_TIME / row_time), 1) if row_time > 0 else PROBE_ROWS
+
+    start_row = probe_rows
+    for chunk_size in schedule_chunk_sizes(A.shape[0] - probe_rows, num_consumers, min_chunk, schedule):
+        enqueue_chunk(A[start_row:start_row + chunk_size, :], start_row)
+        start_row += chunk_size
+
+    for _ in range(num_consumers):
+        GLOBAL_QUEUE.put(STOP)
+
+def scaling_consumer(B, retire_event):
+    """
+    Consumer of the ConsumerPool, it stops on a STOP item or, between two chunks, when the pool retires it.
+
+    The wait for a chunk is bounded by SCALE_INTERVAL so an idle consumer also notices it was retired.
+    """
+    while not retire_event.is_set():
+        try:
+            item = dequeue_chunk(timeout=SCALE_INTERVAL)
+        except queue.Empty:
+            continue
+
+        if item is STOP:
+            pipeline_metrics.finish(time.perf_counter_ns())
+            return
+
+        multiply_chunk(item, B)
+
+
+class ConsumerPool:
+    """
+    Pool of consumers that grows and shrinks between min_consumers and max_consumers.
+
+    Every SCALE_INTERVAL a controller thread looks at the occupancy of GLOBAL_QUEUE and at the producer_wait and
+    consumer_wait histograms of pipeline_metrics since its last decision (the wait rules need the metrics enabled):
+
+    - It adds a consumer if the queue is at least SCALE_UP_OCCUPANCY full or the producer had to wait.
+    - It retires a consumer if the queue is empty and the consumers spent more than SCALE_DOWN_IDLE of the
+      interval waiting.
+
+    Every decision is logged with the logging module.
+    """
+
+    def __init__(self, B, min_consumers=min_threads, max_consumers=max_threads, interval=SCALE_INTERVAL):
+        self.B = B
+        self.min_consumers = max(min_consumers, 1)
+        self.max_consumers = max(max_consumers, self.min_consumers)
+        self.interval = interval
+
+        self.workers = [] #* active (thread, retire_event) pairs
+        self.retired = [] #* retired threads, joined at shutdown
+        self.peak_consumers = 0
+        self.decisions = [] #* (time, action, consumers) of every scaling decision
+
+        self._stop = threading.Event()
+        self._controller = threading.Thread(target=self._control)
+
+    def start(self):
+        """
+        Starts min_consumers consumers and the controller.
+        """
+        for _ in range(self.min_consumers):
+            self._add_consumer()
+        self._controller.start()
+
+    def shutdown(self):
+        """
+        Stops the controller, waits for the retired consumers, sends one STOP item per active consumer and waits for
+        them.
+        """
+        self._stop.set()
+        self._controller.join()
+
+        #? A retired consumer can still be waiting on the queue, it must exit before the STOP items are sent or it
+        #? could take the STOP of an active consumer, which would then wait forever
+        for thread in self.retired:
+            thread.join()
+
+        for _ in self.workers:
+            GLOBAL_QUEUE.put(STOP)
+
+        for thread, _ in self.workers:
+            thread.join()
+
+    def _add_consumer(self):
+        retire_event = threading.Event()
+        thread = threading.Thread(target=scaling_consumer, args=(self.B, retire_event))
+        thread.start()
+        self.workers.append((thread, retire_event))
+        self.peak_consumers = max(self.peak_consumers, len(self.workers))
+
+    def _retire_consumer(self):
+        thread, retire_event = self.workers.pop()
+        retire_event.set()
+        self.retired.append(thread)
+
+    def _decide(self, action, reason):
+        self.decisions.append((time.time(), action, len(self.workers)))
+        logger.info("Pool de consumidores: %s -> %d consumidores (%s)", action, len(self.workers), reason)
+
+    def _control(self):
+        producer_seen, _ = pipeline_metrics.totals("producer_wait")
+        _, consumer_seen = pipeline_metrics.totals("consumer_wait")
+
+        while not self._stop.wait(self.interval):
+            occupancy = GLOBAL_QUEUE.qsize() / GLOBAL_QUEUE.maxsize
+
+            producer_waits, _ = pipeline_metrics.totals("producer_wait")
+            _, consumer_wait = pipeline_metrics.totals("consumer_wait")
+            new_producer_waits = producer_waits - producer_seen
+            new_consumer_wait = (consumer_wait - consumer_seen) / 1e9
+            producer_seen, consumer_seen = producer_waits, consumer_wait
+
+            #? Waits of consumers retired during the interval can push the ratio over 1
+            idle = min(new_consumer_wait / (self.interval * len(self.workers)), 1.0)
+
+            if (occupancy >= SCALE_UP_OCCUPANCY or new_producer_waits) and len(self.workers) < self.max_consumers:
+                self._add_consumer()
+                self._decide("agregar", f"ocupación {occupancy:.2f}, esperas del productor {new_producer_waits}")
+            elif occupancy == 0 and idle > SCALE_DOWN_IDLE and len(self.workers) > self.min_consumers:
+                self._retire_consumer()
+                self._decide("retirar", f"cola vacía, consumidores inactivos {idle:.0%} del intervalo")
+
+def accumulator_dtype(dtype):
+    """
+    Chooses the type used to accumulate the products of a data type, so integer products do not overflow.
+
+    Args:
+        dtype (numpy.dtype): The data type of the operands.
+
+    Returns:
+        numpy.dtype: The accumulation (and result) type.
+    """
+    dtype = np.dtype(dtype)
+    return ACCUMULATOR_DTYPES.get(dtype, dtype)
+
+
+class MatrixJob:
+    """
+    A multiplication submitted to a MatrixService, with its own result buffer, chunks and future.
+
+    The operands are converted to the accumulation type (accumulator_dtype()), so small integers do not overflow.
+    The future gives the result matrix, raises CancelledError if the job was cancelled or the error of a chunk whose
+    product failed.
+    """
+
+    def __init__(self, job_id, A, B, chunk_rows):
+        dtype = accumulator_dtype(np.result_type(A, B))
+
+        self.job_id = job_id
+        self.A = A.astype(dtype, copy=False)
+        self.B = B.astype(dtype, copy=False)
+        self.result = np.zeros((A.shape[0], B.shape[1]), dtype=dtype)
+        self.future = Future()
+
+        self.chunks = deque(split_matrix(self.A, chunk_rows)) #* chunks not taken by a consumer yet
+        self.num_chunks = len(self.chunks)
+        self.in_flight = 0 #* chunks being multiplied
+        self.cancelled = False
+        self.error = None #* exception of the first chunk that failed
+
+        self.submit_time = time.time()
+        self.start_time = None #* time a consumer took the first chunk
+        self.end_time = None
+        self.compute_time = 0.0 #* sum of the compute time of the chunks
+
+    def metrics(self):
+        """
+        Returns the latency metrics of the job in seconds: the wait before its first chunk, the total latency from
+        submission to completion and the compute time of its chunks.
+        """
+        return {
+            "job_id": self.job_id,
+            "shape": (self.A.shape[0], self.B.shape[1]),
+            "chunks": self.num_chunks,
+            "cancelled": self.cancelled,
+            "failed": self.error is not None,
+            "queue_time": None if self.start_time is None else self.start_time - self.submit_time,
+            "latency": None if self.end_time is None else self.end_time - self.submit_time,
+            "compute_time": self.compute_time,
+        }
+
+    def _finish(self):
+        self.end_time = time.time()
+
+        #? The caller may have cancelled the future itself
+        if self.future.done():
+            return
+
+        if self.error is not None:
+            self.future.set_exception(self.error)
+        elif self.cancelled:
+            if not self.future.cancel():
+                self.future.set_exception(CancelledError(f"El trabajo {self.job_id} fue cancelado"))
+        else:
+            self.future.set_result(self.result)
+
+
+class MatrixService:
+    """
+    In-process service that multiplies many matrices at once with one shared pool of consumers.
+
+    Every job is split into chunks of chunk_rows rows. The consumers take the chunks round-robin over the active
+    jobs, one chunk of each job in turn, so a big job cannot starve the small ones. The service keeps no global
+    state: the jobs, their result buffers and the consumers belong to the instance, so several services can run in
+    the same process. A finished job is only referenced by its caller, the service keeps the metrics of the last
+    metrics_history jobs.
+
+    Use it as a context manager or call shutdown() to stop the consumers.
+    """
+
+    def __init__(self, num_consumers=None, chunk_rows=SERVICE_CHUNK_ROWS, metrics_history=SERVICE_METRICS_HISTORY):
+        self.chunk_rows = chunk_rows
+        self.jobs = {} #* jobs not finished yet, by id
+        self.finished = deque(maxlen=metrics_history) #* metrics of the last finished jobs, in completion order
+
+        self._active = deque() #* jobs with chunks left, in round-robin order
+        self._condition = threading.Condition()
+        self._ids = itertools.count()
+        self._closed = False
+
+        self._consumers = [threading.Thread(target=self._consume) for _ in range(num_consumers or os.cpu_count())]
+        for thread in self._consumers:
+            thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, A, B):
+        """
+        Submits the multiplication of A by B.
+
+        Returns:
+            MatrixJob: The job, its future gives the result.
+        """
+        if A.ndim != 2 or B.ndim != 2 or A.shape[1] != B.shape[0]:
+            raise ValueError(f"Formas no válidas para la multiplicación: {A.shape} y {B.shape}")
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("El servicio está detenido")
+
+            job = MatrixJob(next(self._ids), A, B, self.chunk_rows)
+            self.jobs[job.job_id] = job
+
+            if job.chunks:
+                self._active.append(job)
+                self._condition.notify()
+            else:
+                self._complete(job)
+
+        return job
+
+    def cancel(self, job):
+        """
+        Cancels a job: its chunks not taken yet are dropped and its future raises CancelledError once the chunks
+        being multiplied finish.
+
+        Returns:
+            bool: False if the job had already finished.
+        """
+        with self._condition:
+            if job.end_time is not None or job.cancelled:
+                return False
+
+            job.cancelled = True
+            job.chunks.clear()
+            if job in self._active:
+                self._active.remove(job)
+
+            if job.in_flight == 0:
+                self._complete(job)
+
+        return True
+
+    def metrics(self):
+        """
+        Returns the metrics of the last finished jobs (up to metrics_history), in completion order.
+        """
+        with self._condition:
+            return list(self.finished)
+
+    def shutdown(self, wait=True):
+        """
+        Stops the consumers once the submitted jobs finish.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        if wait:
+            for thread in self._consumers:
+                thread.join()
+
+    def _complete(self, job):
+        #? Called with the condition held, the service keeps only the metrics so the buffers of the job can be freed
+        job._finish()
+        del self.jobs[job.job_id]
+        self.finished.append(job.metrics())
+
+    def _next_chunk(self):
+        """
+        Waits for a chunk and takes it from the next job in round-robin order, None if the service is shut down.
+        """
+        with self._condition:
+            while True:
+                while not self._active and not self._closed:
+                    self._condition.wait()
+
+                if not self._active:
+                    return None
+
+                job = self._active.popleft()
+
+                if job.start_time is None:
+                    job.start_time = time.time()
+
+                    #? A future cancelled with job.future.cancel() before its first chunk cancels the job
+                    if not job.future.set_running_or_notify_cancel():
+                        job.cancelled = True
+                        job.chunks.clear()
+                        self._complete(job)
+                        continue
+
+                subA, row_start = job.chunks.popleft()
+                if job.chunks:
+                    self._active.append(job)
+
+                job.in_flight += 1
+                return job, subA, row_start
+
+    def _consume(self):
+        while True:
+            task = self._next_chunk()
+            if task is None:
+                return
+
+            job, subA, row_start = task
+
+            #? The product runs outside the lock and writes only the rows of its chunk
+            compute_start = time.time()
+            try:
+                np.dot(subA, job.B, out=job.result[row_start:row_start + subA.shape[0], :])
+                error = None
+            except Exception as exception:
+                error = exception
+            compute_time = time.time() - compute_start
+
+            with self._condition:
+                job.in_flight -= 1
+                job.compute_time += compute_time
+
+                #? A failed chunk fails the whole job, its other chunks are dropped and the consumer keeps running
+                if error is not None and job.error is None and job.end_time is None:
+                    job.error = error
+                    job.chunks.clear()
+                    if job in self._active:
+                        self._active.remove(job)
+
+                if not job.chunks and job.in_flight == 0 and job.end_time is None:
+                    self._complete(job)
+
+def benchmark_service(sizes, num_consumers=None):
+    """
+    Submits one job per size to a MatrixService at the same time, plus one job that is cancelled right away.
+
+    Args:
+        sizes (list): The size of the square matrices of every job.
+        num_consumers (int): The number of consumers, defaults to the number of cores.
+
+    Returns:
+        list: The metrics of every job, with an is_correct key.
+    """
+    matrices = [(np.random.rand(size, size), np.random.rand(size, size)) for size in sizes]
+    report = []
+
+    with MatrixService(num_consumers) as service:
+        jobs = [service.submit(A, B) for A, B in matrices]
+        cancelled_job = service.submit(*matrices[0])
+        service.cancel(cancelled_job)
+
+        for job, (A, B) in zip(jobs, matrices):
+            is_correct = np.allclose(job.future.result(), np.dot(A, B))
+            report.append(dict(job.metrics(), is_correct=is_correct))
+
+        try:
+            cancelled_job.future.result()
+        except CancelledError:
+            report.append(dict(cancelled_job.metrics(), is_correct=True))
+
+    return report
+
+def reset_pipeline():
+    """
+    Empties the global queue and clears the metrics of a previous run.
+    """
+    while not GLOBAL_QUEUE.empty():
+        GLOBAL_QUEUE.get_nowait()
+
+    stop_event.clear()
+    pipeline_metrics.reset()
+
+def run_pipeline(A, B, num_threads, use_condition=False, schedule='static'):
+    """
+    Multiplies A and B with one producer and num_threads consumers, each product pinned to a single BLAS thread.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix.
+        num_threads (int): The number of consumers.
+        use_condition (bool): Runs the condition variable version instead of the queue-only one.
+        schedule (str): The chunk schedule of the queue-only producer, 'static' uses producer() and the others
+            guided_producer().
+
+    Returns:
+        float: The elapsed time in seconds, the product is left in the global result.
+    """
+    global result
+
+    reset_pipeline()
+    result = np.zeros((A.shape[0], B.shape[1]))
+
+    if use_condition:
+        producer_thread = threading.Thread(target=condition_producer, args=(A, num_threads))
+        consumer_target = condition_consumer
+    elif schedule != 'static':
+        producer_thread = threading.Thread(target=guided_producer, args=(A, B, num_threads, schedule))
+        consumer_target = consumer
+    else:
+        producer_thread = threading.Thread(target=producer, args=(A, num_threads))
+        consumer_target = consumer
+
+    with blas_threads(1):
+        start_time = time.time()
+        producer_thread.start()
+
+        consumer_threads = []
+        for _ in range(num_threads):
+            thread = threading.Thread(target=consumer_target, args=(B,))
+            thread.start()
+            consumer_threads.append(thread)
+
+        producer_thread.join()
+        stop_event.set()
+
+        for thread in consumer_threads:
+            thread.join()
+        elapsed_time = time.time() - start_time
+
+    return elapsed_time
+
+def run_autoscaled_pipeline(A, B, num_chunks, min_consumers=min_threads, max_consumers=max_threads):
+    """
+    Multiplies A and B with one producer and a ConsumerPool, each product pinned to a single BLAS thread.
+
+    Args:
+        A (numpy.ndarray): The first matrix.
+        B (numpy.ndarray): The second matrix.
+        num_chunks (int): The number of chunks to split A into.
+        min_consumers (int): The minimum number of consumers.
+        max_consumers (int): The maximum number of consumers.
+
+    Returns:
+        tuple: The elapsed time in seconds and the pool, the product is left in the global result.
+    """
+    global result
+
+    reset_pipeline()
+    result = np.zeros((A.shape[0], B.shape[1]))
+
+    #? The pool sends the STOP items itself, it is the only one that knows how many consumers are left
+    producer_thread = threading.Thread(target=producer, args=(A, num_chunks, 0))
+    pool = ConsumerPool(B, min_consumers, max_consumers)
+
+    with blas_threads(1):
+        start_time = time.time()
+        pool.start()
+        producer_thread.start()
+        producer_thread.join()
+        pool.shutdown()
+        elapsed_time = time.time() - start_time
+
+    return elapsed_time, pool
+
+def consumer_concurrency(intervals):
+    """
+    Measures how many chunk products ran at the same time from their (start, end) intervals.
+
+    Args:
+        intervals (list): The (start, end) time of every product.
+
+    Returns:
+        tuple: The average concurrency (busy time over the time with at least one product running) and the
+        maximum number of overlapping products.
+    """
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+
+    running = 0
+    max_running = 0
+    busy_time = 0.0
+    covered_time = 0.0
+    last_time = None
+
+    for event_time, change in events:
+        if running > 0:
+            busy_time += running * (event_time - last_time)
+            covered_time += event_time - last_time
+        running += change
+        max_running = max(max_running, running)
+        last_time = event_time
+
+    average = busy_time / covered_time if covered_time > 0 else 0.0
+    return average, max_running
+
+def tail_latency(finish_times):
+    """
+    Measures the tail of a job in seconds: the time between the first consumer running out of work and the last one
+    finishing, from their finish times in nanoseconds.
+    """
+    return (max(finish_times) - min(finish_times)) / 1e9 if finish_times else 0.0
+
+def benchmark_scheduling(size, num_threads=None, repeat=3):
+    """
+    Compares the static chunks of producer() with the guided and factoring schedules of guided_producer(), the tail
+    latency is taken from the finish times of pipeline_metrics (it must be enabled).
+
+    Args:
+        size (int): The size of the square matrices.
+        num_threads (int): The number of consumers, defaults to the number of cores.
+        repeat (int): The number of runs of every schedule, the best one is kept.
+
+    Returns:
+        dict: The time, tail latency and correctness of every schedule.
+    """
+    num_threads = num_threads or os.cpu_count()
+    A = np.random.rand(size, size)
+    B = np.random.rand(size, size)
+    expected = np.dot(A, B)
+
+    report = {}
+    for schedule in SCHEDULES:
+        runs = []
+        for _ in range(repeat):
+            elapsed_time = run_pipeline(A, B, num_threads, schedule=schedule)
+            runs.append((elapsed_time, tail_latency(pipeline_metrics.finish_times()), np.allclose(expected, result)))
+
+        elapsed_time, tail, is_correct = min(runs)
+        report[schedule] = {"time": elapsed_time, "tail_latency": tail, "is_correct": is_correct}
+
+    return report
+
+def benchmark_concurrency(size, num_threads=None):
+    """
+    Runs the condition variable pipeline and the queue-only pipeline on the same matrices and compares how many
+    consumers compute at the same time, from the compute intervals of pipeline_metrics (it must be enabled).
+
+    Args:
+        size (int): The size of the square matrices.
+        num_threads (int): The number of consumers, defaults to the number of cores.
+
+    Returns:
+        dict: The time, average and maximum concurrency and correctness of every pipeline.
+    """
+    num_threads = num_threads or os.cpu_count()
+    A = np.random.rand(size, size)
+    B = np.random.rand(size, size)
+    expected = np.dot(A, B)
+
+    report = {}
+    for name, use_condition in (("condition", True), ("queue", False)):
+        elapsed_time = run_pipeline(A, B, num_threads, use_condition)
+        average, maximum = consumer_concurrency(pipeline_metrics.compute_intervals())
+        report[name] = {
+            "time": elapsed_time,
+            "average_concurrency": average,
+            "max_concurrency": maximum,
+            "is_correct": np.allclose(expected, result),
+        }
+
+    return report
+
 def test():
     """
     Measures the execution time for parallel matrix multiplication.
@@ -143,7 +1225,6 @@ def test():
     
     A = np.random.rand(size, size)
     B = np.random.rand(size, size)
-    result = np.zeros((size, size))
 
     # ? Testing serial matrix multiplication
     start_time = time.time()
@@ -155,38 +1236,61 @@ def test():
 
     #? Testing parallel matrix multiplication
 
-    start_time = time.time()
-    producer_thread = threading.Thread(target=producer, args=(A, num_threads))
-    producer_thread.start()
-
-    consumer_threads = []
-    for _ in range(num_threads):
-        thread = threading.Thread(target=consumer, args=(B,))
-        thread.start()
-        consumer_threads.append(thread)
-
-    producer_thread.join()
-    stop_event.set()
-
-    for thread in consumer_threads:
-        thread.join()
-    end_time = time.time()
-    parallel_elapsed_time = end_time - start_time
+    parallel_elapsed_time = run_pipeline(A, B, num_threads)
+    average_concurrency, _ = consumer_concurrency(pipeline_metrics.compute_intervals())
+    static_tail = tail_latency(pipeline_metrics.finish_times())
 
     print("Tiempo en la version paralela: ", parallel_elapsed_time)
+    print(f"Consumidores calculando a la vez (promedio): {average_concurrency:.2f}")
 
     print("Speedup: ", serial_elapsed_time / parallel_elapsed_time, "X")
 
     isCorrect = np.allclose(serial_result, result)
 
+    #? Testing the factoring self-scheduled producer
+    factoring_elapsed_time = run_pipeline(A, B, num_threads, schedule='factoring')
+    factoring_tail = tail_latency(pipeline_metrics.finish_times())
+    isCorrect = isCorrect and np.allclose(serial_result, result)
+
+    print(f"Tiempo con chunks por factoring: {factoring_elapsed_time:.4f} segundos")
+    print(f"Latencia de cola: estática {static_tail:.4f} s, factoring {factoring_tail:.4f} s")
+
+    #? Testing the autoscaling consumer pool, with more chunks than consumers so the pool has room to adapt
+    autoscaled_elapsed_time, pool = run_autoscaled_pipeline(A, B, 4 * max_threads, min_threads, max_threads)
+    isCorrect = isCorrect and np.allclose(serial_result, result)
+
+    print(f"Tiempo con el pool adaptativo: {autoscaled_elapsed_time:.4f} segundos")
+    print(f"Consumidores máximos: {pool.peak_consumers}, decisiones de escalado: {len(pool.decisions)}")
+
+    #? Testing the multi-job service, a job of the full size submitted together with smaller ones
+    job_metrics = benchmark_service([size, max(size // 4, 1), max(size // 4, 1)], num_threads)
+    isCorrect = isCorrect and all(metrics["is_correct"] for metrics in job_metrics)
+
+    for metrics in job_metrics:
+        print(f"Trabajo {metrics['job_id']} {metrics['shape']}: latencia {metrics['latency']:.4f} segundos"
+              f"{' (cancelado)' if metrics['cancelled'] else ''}")
+
+    #? The report shows the waits of the fixed pipeline
+    run_pipeline(A, B, num_threads)
+
     if isCorrect:
         print("El resultado de las operaciones entre las matrices es correcto.")
     else:
         print("El resultado de las operaciones entre las matrices es incorrecto.")
 
     #? Report execution times
-    avg_producer_wait_time = sum(producer_wait_times) / len(producer_wait_times) if producer_wait_times else 0
-    avg_consumer_wait_time = sum(consumer_wait_times) / len(consumer_wait_times) if consumer_wait_times else 0
+    counters, histograms, _ = pipeline_metrics.snapshot()
+    empty_histogram = LatencyHistogram()
+    avg_producer_wait_time = histograms.get("producer_wait", empty_histogram).summary()["mean"]
+    avg_consumer_wait_time = histograms.get("consumer_wait", empty_histogram).summary()["mean"]
+    end_to_end = histograms.get("end_to_end", empty_histogram).summary()
+    fill_count = counters.get("queue_full", 0)
+    empty_count = counters.get("queue_empty", 0)
+
+    with open("metricas.json", "w", encoding="utf-8") as file:
+        file.write(pipeline_metrics.to_json())
+    with open("metricas.prom", "w", encoding="utf-8") as file:
+        file.write(pipeline_metrics.to_prometheus())
 
     print(f"Tiempo de ejecución secuencial: {serial_elapsed_time:.4f} segundos")
     print(f"Tiempo de ejecución paralelo: {parallel_elapsed_time:.4f} segundos")
@@ -194,6 +1298,7 @@ def test():
     print(f"Tiempo de espera promedio del consumidor: {avg_consumer_wait_time:.4f} segundos")
     print(f"Cola llena {fill_count} veces")
     print(f"Cola vacía {empty_count} veces")
+    print(f"Latencia por chunk: p50 {end_to_end['p50']:.4f} s, p99 {end_to_end['p99']:.4f} s")
 
     result = [
         A,
@@ -206,6 +1311,7 @@ def test():
         avg_consumer_wait_time,
         fill_count,
         empty_count,
+        average_concurrency,
         isCorrect
     ]
 
@@ -218,7 +1324,7 @@ def generate_report():
     date = datetime.now().strftime("%Y-%m-%d")
     
     test_results = test()
-    A, B, size, serial_time, parallel_time, speedup, producer_wait_time, consumer_wait_time, fill_count, empty_count, isCorrect = test_results
+    A, B, size, serial_time, parallel_time, speedup, producer_wait_time, consumer_wait_time, fill_count, empty_count, concurrency, isCorrect = test_results
 
     np.set_printoptions(precision=3, suppress=True, linewidth=150)
 
@@ -267,12 +1373,26 @@ global result matrix.
 
 For the implementation of this study the following functions were carried out:
 
-- **serial_multiply_matrices()**: This function divides matrix A into chunks and multiplies each chunk by matrix B serially.
+- **serial_multiply_matrices()**: This function divides matrix A into chunks and multiplies each chunk by matrix B serially, one matrix product per chunk on a single BLAS thread.
 - **split_matrix(A, chunk_size)**: This function splits matrix A into chunks of specified size and returns them as a list of submatrices.
 - producer(A, num_threads)**: This function takes care of adding chunks of matrix A to the shared queue using the split_matrix() function 
-to split the matrix.
-- consumer(B)**: This function extracts chunks from the shared queue, multiplies each one by the matrix B and stores the result in the global 
-result matrix. of results.
+to split the matrix, followed by one STOP item per consumer. The queue is the only synchronization point.
+- consumer(B)**: This function extracts chunks from the shared queue, multiplies each one by the matrix B outside any lock and writes the 
+product straight into its own rows of the global result matrix, until it takes a STOP item.
+- **guided_producer(A, B, num_consumers, schedule)**: A producer that measures the compute time per row and emits chunks with guided or 
+factoring self-scheduling, large chunks first and shrinking toward the end, which shortens the tail where some consumers are idle while 
+the last chunks finish (tail_latency()).
+- **ConsumerPool / run_autoscaled_pipeline()**: A pool of consumers between min_threads and max_threads, whose controller adds a consumer 
+when the queue fills up or the producer waits, retires one when the queue is empty and the consumers are idle, and logs every decision.
+- **MatrixService / MatrixJob**: An in-process service without global state that accepts many multiplications at once. Every job has its own 
+result buffer and future, the shared consumers take its chunks round-robin with the other jobs, and jobs can be cancelled and report 
+their queue time, latency and compute time.
+- **condition_producer() / condition_consumer()**: The original version synchronized with a condition variable, where the consumer holds the 
+lock during the product. They are kept to compare against with benchmark_concurrency(), which measures from the compute intervals how many 
+consumers multiply at the same time (Concurrency column).
+- **PipelineMetrics / LatencyHistogram**: Every thread records its counters and HDR-style log-linear latency histograms (queue wait, compute 
+and end-to-end per chunk) without locks. They are merged only when exported as JSON or Prometheus text (metricas.json, metricas.prom), and the 
+per-chunk messages are only logged with tracing enabled, so the measurement does not slow down the pipeline.
 - **test()**: This function measures the execution time of parallel and serial matrix multiplication, and reports the producer and consumer 
 wait times, as well as queue fill and empty.
 
@@ -294,11 +1414,11 @@ multiplication using the **np.allclose(**) function. The result was (correct = t
 
 The test results show the following data:
 
-| **Matrix Size** | **Serial** | **Parallel** | **Avg. Producer** | **Avg. Consume**r | **Queue Full** | **Queue Empty** | **Speedup** |
-|-------------|--------|----------|---------------|---------------|------------|-------------|---------|
+| **Matrix Size** | **Serial** | **Parallel** | **Avg. Producer** | **Avg. Consume**r | **Queue Full** | **Queue Empty** | **Concurrency** | **Speedup** |
+|-------------|--------|----------|---------------|---------------|------------|-------------|-------------|---------|
 """.format(test_results)
 
-    qmd_content += f"| {size} | {serial_time:.4f} | {parallel_time:.4f} | {producer_wait_time:.4f} | {consumer_wait_time:.4f} | {fill_count} | {empty_count} | {speedup:.2f}x |\n"
+    qmd_content += f"| {size} | {serial_time:.4f} | {parallel_time:.4f} | {producer_wait_time:.4f} | {consumer_wait_time:.4f} | {fill_count} | {empty_count} | {concurrency:.2f} | {speedup:.2f}x |\n"
     
     qmd_content += """
 
@@ -363,10 +1483,9 @@ An important point that was observed was that only one producer thread was neces
 This is because the producing operation (splitting the matrix into chunks) is much faster compared to the consuming operation 
 (multiplying sub-matrices), which caused the producer to manage to keep the queue full several times without the need for support from more threads.
 
-However, an important area of improvement would be the implementation of a dynamic adjustment of the number of consuming threads. 
-Although it was not applied in this implementation, adjusting the number of threads based on the queue load could further improve 
-efficiency. For example, increasing the number of consumers when the queue is consistently full and reducing it when the queue is empty 
-would help optimize the load balance and avoid bottlenecks in scenarios where the consumers are slower than the producer.
+A dynamic adjustment of the number of consuming threads is implemented by the ConsumerPool: it increases the number of consumers 
+when the queue is consistently full and reduces it when the queue is empty, which helps optimize the load balance and avoid bottlenecks 
+in scenarios where the consumers are slower than the producer. Its scaling decisions are logged so the thresholds can be tuned.
    
    """
     with open("informe.qmd", "w", encoding="utf-8") as file:
@@ -384,4 +1503,5 @@ would help optimize the load balance and avoid bottlenecks in scenarios where th
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
     generate_report()
\ No newline at end of file